@@ -0,0 +1,206 @@
+"""
+Answer many degrees queries in one run.
+
+Usage: python batch.py [-j workers] directory [pairs]
+
+Each line of `pairs` (or of standard input, when it is omitted or "-")
+holds a source and a target separated by a tab or a comma (names with
+commas can be quoted), each given as a person ID or an unambiguous
+name. One JSON object is written per line, in input order, to standard
+output.
+
+With -j, sources are searched in a process pool whose workers share
+the graph's arrays through shared memory.
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+import time
+
+import degrees
+import graph as compact
+
+# Graph attached by each pool worker, and the shared block backing it
+worker_graph = None
+worker_block = None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer many degrees queries in one run.")
+    parser.add_argument("directory")
+    parser.add_argument("pairs", nargs="?", default="-")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of worker processes (default: none)")
+    args = parser.parse_args()
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    directory = args.directory
+    filename = args.pairs
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(directory)
+    print("Data loaded.", file=sys.stderr)
+
+    if filename == "-":
+        queries = read_queries(sys.stdin)
+    else:
+        with open(filename, encoding="utf-8") as f:
+            queries = read_queries(f)
+
+    start = time.perf_counter()
+    results = solve(queries, degrees.get_compact_graph(), args.workers)
+    seconds = time.perf_counter() - start
+
+    for result in results:
+        print(json.dumps(result))
+    rate = len(results) / seconds if seconds else float("inf")
+    print(f"{len(results)} queries in {seconds:.3f}s ({rate:.1f} queries/s)",
+          file=sys.stderr)
+
+
+def read_queries(lines):
+    """
+    Returns the list of fields of every non-empty line. A line is split
+    on tabs if it has any, and on commas otherwise, with CSV quoting, so
+    a name with a comma can be written as "Sammy Davis, Jr.".
+    """
+    queries = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        delimiter = "\t" if "\t" in line else ","
+        fields = next(csv.reader([line], delimiter=delimiter), [])
+        queries.append([field.strip() for field in fields])
+    return queries
+
+
+def resolve(query):
+    """
+    Returns the person_id for a person ID or a name, or raises
+    LookupError if there is no such person or the name is ambiguous.
+    """
+    if query in degrees.people:
+        return query
+    person_ids = degrees.names.get(query.lower(), set())
+    if len(person_ids) == 0:
+        raise LookupError(f"person not found: {query}")
+    if len(person_ids) > 1:
+        raise LookupError(f"ambiguous name: {query}")
+    return next(iter(person_ids))
+
+
+def solve(queries, graph=None, workers=None):
+    """
+    Returns one result dict per (source, target) query, in order.
+    A query without exactly two fields gets an error result.
+    Queries are grouped by source so that one search answers every
+    target of that source. With a graph and a number of workers,
+    the sources are searched in a process pool.
+    """
+    results = [None] * len(queries)
+
+    # Maps each source to the (index, target) of its queries
+    by_source = {}
+    for i, query in enumerate(queries):
+        if len(query) != 2:
+            results[i] = {"query": list(query),
+                          "error": "expected a source and a target"}
+            continue
+        source, target = query
+        result = {"source": source, "target": target}
+        try:
+            source_id = resolve(source)
+            target_id = resolve(target)
+        except LookupError as e:
+            result["error"] = str(e)
+            results[i] = result
+            continue
+        result["source_id"] = source_id
+        result["target_id"] = target_id
+        results[i] = result
+        by_source.setdefault(source_id, []).append((i, target_id))
+
+    groups = {source_id: {target_id for _, target_id in group}
+              for source_id, group in by_source.items()}
+    if graph is not None and workers is not None:
+        paths_by_source = solve_parallel(graph, groups, workers)
+    else:
+        paths_by_source = {
+            source_id: degrees.shortest_paths_from(source_id, targets, graph=graph)
+            for source_id, targets in groups.items()
+        }
+
+    for source_id, group in by_source.items():
+        paths = paths_by_source[source_id]
+        for i, target_id in group:
+            results[i].update(path_result(paths[target_id]))
+
+    return results
+
+
+def solve_parallel(graph, groups, workers):
+    """
+    Returns the same as graph.paths_from for every source in `groups`
+    (a dict of source -> set of targets), using a pool of `workers`
+    processes attached to a shared copy of the graph.
+    """
+    person_index = graph.person_index
+    tasks = [(person_index[source], sorted(person_index[target]
+                                           for target in targets))
+             for source, targets in groups.items()]
+    if not tasks:
+        return {}
+
+    block, layout = compact.share(graph)
+    try:
+        with multiprocessing.Pool(workers, initializer=attach_worker,
+                                  initargs=(layout,)) as pool:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            index_results = pool.map(solve_task, tasks, chunksize)
+    finally:
+        block.close()
+        block.unlink()
+
+    paths_by_source = {}
+    for source, paths in zip(groups, index_results):
+        paths_by_source[source] = {
+            graph.person_ids[target]: None if path is None else [
+                (graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in path]
+            for target, path in paths.items()
+        }
+    return paths_by_source
+
+
+def attach_worker(layout):
+    """
+    Pool initializer: maps the shared graph into this worker.
+    """
+    global worker_graph, worker_block
+    worker_block, worker_graph = compact.attach(layout)
+
+
+def solve_task(task):
+    """
+    Answers one (source, targets) task with person indices in the worker.
+    """
+    source, targets = task
+    return worker_graph.index_paths_from(source, targets)
+
+
+def path_result(path):
+    """
+    Returns the JSON fields for a path from shortest_path.
+    """
+    if path is None:
+        return {"degrees": None, "path": None}
+    return {"degrees": len(path), "path": [list(step) for step in path]}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,789 @@
+"""
+Benchmarks for the degrees search on synthetic data.
+
+Usage: python benchmark.py BENCHMARK [edges] [--check] [--output FILE]
+
+BENCHMARK is one of frontier, bidirectional, compact, snapshot, batch,
+parallel, loader, landmarks, cache, names, stats, delta or suite.
+
+With --check, benchmarks that compare two implementations also assert
+that they give the same answers. The suite benchmark times loading,
+neighbor expansion and path queries on generated datasets of growing
+size and writes the results as JSON to FILE (default SUITE_OUTPUT).
+"""
+
+import csv
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import batch
+import check
+import degrees
+import generate
+from cache import TreeCache
+from graph import CompactGraph
+from landmarks import LandmarkIndex
+from names import NameIndex
+from stats import SearchStats, json_sink
+from util import QueueFrontier, DequeQueueFrontier
+
+# Number of star credits (person -> movie edges) in the synthetic graph
+EDGES = 1000000
+
+# Average number of stars per movie and credits per person
+CAST_SIZE = 10
+CREDITS_PER_PERSON = 5
+
+# Number of source/target pairs timed per frontier
+QUERIES = 5
+
+# Number of source/target pairs compared between search modes
+MODE_QUERIES = 20
+
+# Number of name queries of each kind
+NAME_QUERIES = 200
+
+# Number of movies added by each delta file
+DELTA_ROWS = (100, 1000, 10000)
+
+# Number of batch queries, and of distinct sources among them
+BATCH_QUERIES = 2000
+BATCH_SOURCES = 20
+
+# Default number of star rows written for the loader benchmark
+LOADER_ROWS = 10000000
+
+# Seconds a frontier may spend on all queries before it is abandoned
+BUDGET = 60
+
+# Fractions of the edges argument at which the suite runs, the number
+# of people whose neighbors it times, and where its results are written
+SUITE_SCALES = (0.01, 0.1, 1)
+SUITE_NEIGHBORS = 10000
+SUITE_OUTPUT = "benchmark-suite.json"
+
+# Whether comparisons assert that both sides agree (set by --check)
+CHECK = False
+
+# Where the suite writes its results (set by --output)
+OUTPUT = SUITE_OUTPUT
+
+
+def synthetic_graph(edges, seed=0):
+    """
+    Fill degrees.people, degrees.movies and degrees.names with a random
+    graph of `edges` star credits. The same seed gives the same graph.
+    """
+    print(f"Building synthetic graph with {edges} edges...")
+    rng = random.Random(seed)
+    num_movies = max(1, edges // CAST_SIZE)
+    num_people = max(2, edges // CREDITS_PER_PERSON)
+
+    clear_data()
+
+    for i in range(num_people):
+        person_id = str(i)
+        name = f"person {i}"
+        degrees.people[person_id] = {"name": name, "birth": "", "movies": set()}
+        degrees.names[name] = {person_id}
+    for i in range(num_movies):
+        degrees.movies[str(i)] = {"title": f"movie {i}", "year": "", "stars": set()}
+
+    for _ in range(edges):
+        person_id = str(rng.randrange(num_people))
+        movie_id = str(rng.randrange(num_movies))
+        degrees.people[person_id]["movies"].add(movie_id)
+        degrees.movies[movie_id]["stars"].add(person_id)
+
+
+def write_csvs(directory):
+    """
+    Write the current degrees.people and degrees.movies as the three
+    CSV files that load_data reads.
+    """
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person_id, person in degrees.people.items():
+            writer.writerow([person_id, person["name"], person["birth"]])
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie_id, movie in degrees.movies.items():
+            writer.writerow([movie_id, movie["title"], movie["year"]])
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for person_id, person in degrees.people.items():
+            for movie_id in person["movies"]:
+                writer.writerow([person_id, movie_id])
+
+
+def write_random_csvs(directory, rows, seed=0):
+    """
+    Stream random people, movies and stars CSV files with `rows` star
+    rows to `directory`, without building the graph in memory.
+    """
+    rng = random.Random(seed)
+    num_movies = max(1, rows // CAST_SIZE)
+    num_people = max(2, rows // CREDITS_PER_PERSON)
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(num_people):
+            writer.writerow([i, f"Person {i}", 1900 + i % 100])
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(num_movies):
+            writer.writerow([i, f"Movie {i}", 1900 + i % 120])
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for _ in range(rows):
+            writer.writerow([rng.randrange(num_people), rng.randrange(num_movies)])
+
+
+def legacy_load_data(directory):
+    """
+    The original csv.DictReader loader, kept for comparison with
+    degrees.load_csv.
+    """
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            degrees.people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"],
+                "movies": set()
+            }
+            if row["name"].lower() not in degrees.names:
+                degrees.names[row["name"].lower()] = {row["id"]}
+            else:
+                degrees.names[row["name"].lower()].add(row["id"])
+
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            degrees.movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"],
+                "stars": set()
+            }
+
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                degrees.people[row["person_id"]]["movies"].add(row["movie_id"])
+                degrees.movies[row["movie_id"]]["stars"].add(row["person_id"])
+            except KeyError:
+                pass
+
+
+# Run in a fresh interpreter so that each loader gets its own peak RSS
+LOADER_SCRIPT = """
+import json, resource, sys, time
+import benchmark, degrees
+loader = benchmark.legacy_load_data if sys.argv[1] == "legacy" else degrees.load_csv
+start = time.perf_counter()
+loader(sys.argv[2])
+seconds = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": seconds, "peak": peak}))
+"""
+
+
+def clear_data():
+    """
+    Empty the data loaded into degrees.
+    """
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    degrees.compact_graph = None
+    degrees.name_index = None
+
+
+def query_pairs(count, seed=0):
+    """
+    Returns `count` random (source, target) pairs of people with credits.
+    """
+    rng = random.Random(seed)
+    candidates = [person_id for person_id, person in degrees.people.items()
+                  if person["movies"]]
+    return [(rng.choice(candidates), rng.choice(candidates))
+            for _ in range(count)]
+
+
+def check_same_length(source, target, expected, path):
+    """
+    Asserts that `path` is a valid path of the same length as `expected`.
+    """
+    assert (path is None) == (expected is None), (source, target)
+    if path is not None:
+        assert len(path) == len(expected), (source, target)
+        check.check_path(source, target, path)
+
+
+def with_deadline(frontier_class, deadline):
+    """
+    Returns a subclass of `frontier_class` that raises TimeoutError
+    once `deadline` (a time.perf_counter value) has passed.
+    """
+    class DeadlineFrontier(frontier_class):
+        def remove(self):
+            if time.perf_counter() > deadline:
+                raise TimeoutError
+            return super().remove()
+    return DeadlineFrontier
+
+
+def time_queries(pairs, frontier_class, budget=BUDGET):
+    """
+    Returns the total seconds spent answering every pair,
+    or None if the frontier ran out of budget.
+    """
+    start = time.perf_counter()
+    frontier_class = with_deadline(frontier_class, start + budget)
+    try:
+        for source, target in pairs:
+            degrees.shortest_path(source, target, frontier_class=frontier_class)
+    except TimeoutError:
+        return None
+    return time.perf_counter() - start
+
+
+def bench_frontiers(edges):
+    """
+    Times shortest_path with the list and deque queue frontiers.
+    """
+    synthetic_graph(edges)
+    pairs = query_pairs(QUERIES)
+    for frontier_class in (QueueFrontier, DequeQueueFrontier):
+        seconds = time_queries(pairs, frontier_class)
+        if seconds is None:
+            print(f"{frontier_class.__name__}: over {BUDGET}s "
+                  f"for {len(pairs)} queries")
+        else:
+            print(f"{frontier_class.__name__}: {seconds:.3f}s "
+                  f"for {len(pairs)} queries")
+
+
+def bench_bidirectional(edges):
+    """
+    Compares explored states and time of the one-sided and
+    bidirectional searches, grouped by degrees of separation.
+    """
+    synthetic_graph(edges)
+    results = {}
+    for source, target in query_pairs(MODE_QUERIES):
+        row = []
+        paths = []
+        for bidirectional in (False, True):
+            stats = {}
+            start = time.perf_counter()
+            path = degrees.shortest_path(source, target,
+                                         bidirectional=bidirectional,
+                                         stats=stats)
+            row.append((stats["explored_states"],
+                        time.perf_counter() - start))
+            paths.append(path)
+        if CHECK:
+            check_same_length(source, target, *paths)
+        separation = "none" if path is None else len(path)
+        results.setdefault(separation, []).append(row)
+
+    print("degrees  queries  explored (bfs)  explored (bidi)  "
+          "time (bfs)  time (bidi)")
+    for separation in sorted(results, key=str):
+        rows = results[separation]
+        count = len(rows)
+        explored = [sum(row[i][0] for row in rows) / count for i in (0, 1)]
+        seconds = [sum(row[i][1] for row in rows) / count for i in (0, 1)]
+        print(f"{separation:>7}  {count:>7}  {explored[0]:>14.0f}  "
+              f"{explored[1]:>15.0f}  {seconds[0]:>9.4f}s  {seconds[1]:>10.4f}s")
+
+
+def bench_compact(edges):
+    """
+    Compares memory and search time of the dict model and CompactGraph.
+    """
+
+    # Rebuild the dict model while tracing allocations
+    tracemalloc.start()
+    synthetic_graph(edges)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    graph = CompactGraph.from_dicts(degrees.people, degrees.movies)
+    compact_bytes = tracemalloc.get_traced_memory()[0] - dict_bytes
+    tracemalloc.stop()
+
+    print(f"dict model:   {dict_bytes / 2**20:8.1f} MiB")
+    print(f"CompactGraph: {compact_bytes / 2**20:8.1f} MiB "
+          f"({graph.nbytes() / 2**20:.1f} MiB of adjacency arrays)")
+
+    pairs = query_pairs(QUERIES)
+    paths = []
+    for label, model in (("dict model", None), ("CompactGraph", graph)):
+        start = time.perf_counter()
+        paths.append([degrees.shortest_path(source, target, graph=model)
+                      for source, target in pairs])
+        seconds = time.perf_counter() - start
+        print(f"{label}: {seconds:.3f}s for {len(pairs)} queries")
+    if CHECK:
+        for (source, target), expected, path in zip(pairs, *paths):
+            check_same_length(source, target, expected, path)
+
+
+def bench_landmarks(edges):
+    """
+    Reports the landmark index build time, size and bound latency, and
+    compares its A* search with breadth-first search on CompactGraph.
+    """
+    synthetic_graph(edges)
+    graph = degrees.get_compact_graph()
+
+    start = time.perf_counter()
+    index = LandmarkIndex.build(graph)
+    seconds = time.perf_counter() - start
+    print(f"{len(index.landmarks)} landmarks built in {seconds:.2f}s, "
+          f"{index.nbytes() / 2**20:.1f} MiB")
+
+    pairs = [(graph.person_index[source], graph.person_index[target])
+             for source, target in query_pairs(BATCH_QUERIES)]
+    start = time.perf_counter()
+    for source, target in pairs:
+        index.bounds(source, target)
+    seconds = time.perf_counter() - start
+    print(f"bounds: {seconds / len(pairs) * 1e6:.1f}us per pair")
+
+    pairs = query_pairs(MODE_QUERIES)
+    paths = []
+    for label, landmarks in (("breadth-first", None), ("landmark A*", index)):
+        explored = 0
+        start = time.perf_counter()
+        results = []
+        for source, target in pairs:
+            stats = {}
+            results.append(degrees.shortest_path(
+                source, target, stats=stats, graph=graph, landmarks=landmarks))
+            explored += stats.get("explored_states", 0)
+        seconds = time.perf_counter() - start
+        paths.append(results)
+        print(f"{label}: {seconds:.3f}s for {len(pairs)} queries, "
+              f"{explored} states explored")
+    if CHECK:
+        for (source, target), expected, path in zip(pairs, *paths):
+            check_same_length(source, target, expected, path)
+
+
+def bench_cache(edges):
+    """
+    Times repeated queries from a few popular sources with and without
+    a TreeCache, and reports its counters.
+    """
+    synthetic_graph(edges)
+    graph = degrees.get_compact_graph()
+
+    # A few sources asked about many times, as with popular actors
+    rng = random.Random(1)
+    people = list(degrees.people)
+    sources = rng.sample(people, BATCH_SOURCES)
+    pairs = [(rng.choice(sources), rng.choice(people))
+             for _ in range(BATCH_QUERIES)]
+
+    trees = TreeCache(graph)
+    paths = []
+    for label, model in (("no cache", None), ("TreeCache", trees)):
+        start = time.perf_counter()
+        paths.append([degrees.shortest_path(source, target, graph=graph,
+                                            trees=model)
+                      for source, target in pairs])
+        seconds = time.perf_counter() - start
+        print(f"{label}: {seconds:.3f}s for {len(pairs)} queries")
+    print(trees.stats())
+    if CHECK:
+        for (source, target), expected, path in zip(pairs, *paths):
+            check_same_length(source, target, expected, path)
+
+
+def synthetic_names(count, seed=0):
+    """
+    Returns `count` lowercased "first last" names made of random
+    syllables. The same seed gives the same names.
+    """
+    rng = random.Random(seed)
+    return [f"{generate.word(rng)} {generate.word(rng)}" for _ in range(count)]
+
+
+def misspell(name, rng):
+    """
+    Returns a name with one character deleted, replaced or swapped.
+    """
+    i = rng.randrange(len(name) - 1)
+    edit = rng.randrange(3)
+    if edit == 0:
+        return name[:i] + name[i + 1:]
+    if edit == 1:
+        return name[:i] + rng.choice("aeiourst") + name[i + 1:]
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+def bench_names(count):
+    """
+    Reports the NameIndex build time and size, and the latency and
+    recall of exact, prefix and misspelled queries over `count` names.
+    """
+    clear_data()
+    for i, name in enumerate(synthetic_names(count)):
+        degrees.names.setdefault(name, set()).add(str(i))
+
+    start = time.perf_counter()
+    index = degrees.get_name_index()
+    seconds = time.perf_counter() - start
+    print(f"{len(index.sorted_keys)} names indexed in {seconds:.2f}s, "
+          f"{index.nbytes() / 2**20:.1f} MiB of trigram postings")
+
+    rng = random.Random(1)
+    names = rng.sample(index.sorted_keys,
+                       min(NAME_QUERIES, len(index.sorted_keys)))
+    queries = {
+        "exact": [(name, name) for name in names],
+        "prefix": [(name[:max(3, len(name) // 2)], name) for name in names],
+        "misspelled": [(misspell(name, rng), name) for name in names],
+    }
+    for label, pairs in queries.items():
+        found = 0
+        start = time.perf_counter()
+        for query, name in pairs:
+            found += name in index.search(query)
+        seconds = time.perf_counter() - start
+        print(f"{label}: {seconds / len(pairs) * 1000:.2f}ms per query, "
+              f"{found}/{len(pairs)} found in the top {NameIndex.search.__defaults__[0]}")
+        if CHECK and label == "exact":
+            assert found == len(pairs), label
+
+
+def bench_stats(edges):
+    """
+    Measures the overhead of tracing a search with SearchStats and
+    prints the record of the slowest query.
+    """
+    synthetic_graph(edges)
+    pairs = query_pairs(MODE_QUERIES)
+    records = []
+    for label, make_stats in (("plain dict", dict),
+                              ("SearchStats", lambda: SearchStats(records.append))):
+        for bidirectional in (False, True):
+            start = time.perf_counter()
+            for source, target in pairs:
+                degrees.shortest_path(source, target, stats=make_stats(),
+                                      bidirectional=bidirectional)
+            seconds = time.perf_counter() - start
+            mode = "bidirectional" if bidirectional else "frontier"
+            print(f"{label}, {mode}: {seconds:.3f}s for {len(pairs)} queries")
+    slowest = max(records, key=lambda record: record["seconds"])
+    json_sink(sys.stdout)(slowest)
+
+
+def bench_delta(edges):
+    """
+    Times applying delta files of growing size to a loaded graph, whose
+    CompactGraph is patched in place, then the catching up of a
+    TreeCache and a LandmarkIndex built before them, and a compaction
+    of the graph compared with rebuilding it.
+    """
+    synthetic_graph(edges)
+    graph = degrees.get_compact_graph()
+    trees = TreeCache(graph)
+    index = LandmarkIndex.build(graph)
+    pairs = query_pairs(BATCH_SOURCES, seed=1)
+    for source, target in pairs:
+        trees.shortest_path(source, target)
+    rng = random.Random(1)
+    people = list(degrees.people)
+    movies = list(degrees.movies)
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in DELTA_ROWS:
+            filename = os.path.join(directory, f"delta{rows}.csv")
+            with open(filename, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["op", "person_id", "movie_id", "name", "year"])
+                for i in range(rows):
+                    movie_id = f"delta{rows}-{i}"
+                    writer.writerow(["add", "", movie_id, f"movie {movie_id}", ""])
+                    for person_id in rng.sample(people, CAST_SIZE):
+                        writer.writerow(["add", person_id, movie_id, "", ""])
+                    removed = people.pop(rng.randrange(len(people)))
+                    writer.writerow(["remove", removed, "", "", ""])
+
+            start = time.perf_counter()
+            applied = degrees.apply_delta(filename)
+            seconds = time.perf_counter() - start
+            print(f"{applied} delta rows applied in {seconds:.3f}s")
+
+    start = time.perf_counter()
+    trees.current_graph()
+    seconds = time.perf_counter() - start
+    print(f"TreeCache caught up in {seconds:.3f}s, dropping "
+          f"{trees.stats()['invalidations']} of {len(pairs)} trees")
+    start = time.perf_counter()
+    index.update()
+    seconds = time.perf_counter() - start
+    print(f"LandmarkIndex caught up in {seconds:.3f}s")
+
+    start = time.perf_counter()
+    graph.compact()
+    seconds = time.perf_counter() - start
+    print(f"CompactGraph compacted in {seconds:.3f}s")
+    assert degrees.get_compact_graph() is graph
+    start = time.perf_counter()
+    CompactGraph.from_dicts(degrees.people, degrees.movies)
+    seconds = time.perf_counter() - start
+    print(f"CompactGraph rebuilt in {seconds:.3f}s")
+
+
+def bench_snapshot(edges):
+    """
+    Compares load_data from the CSV files (cold start, which also writes
+    the snapshot) with load_data from the snapshot (warm start).
+    """
+    synthetic_graph(edges)
+    with tempfile.TemporaryDirectory() as directory:
+        write_csvs(directory)
+        for label in ("cold", "warm"):
+            clear_data()
+            start = time.perf_counter()
+            degrees.load_data(directory)
+            seconds = time.perf_counter() - start
+            print(f"{label} start: {seconds:.3f}s")
+        size = os.path.getsize(os.path.join(directory, "degrees.snapshot"))
+        print(f"snapshot size: {size / 2**20:.1f} MiB")
+
+
+def batch_queries():
+    """
+    Returns BATCH_QUERIES (source, target) pairs over BATCH_SOURCES sources.
+    """
+    sources = [source for source, _ in query_pairs(BATCH_SOURCES, seed=1)]
+    targets = [target for _, target in query_pairs(BATCH_QUERIES, seed=2)]
+    return [(sources[i % len(sources)], target)
+            for i, target in enumerate(targets)]
+
+
+def bench_batch(edges):
+    """
+    Compares the throughput of one search per query with batch.solve,
+    which shares one search between the queries of each source.
+    """
+    synthetic_graph(edges)
+    graph = CompactGraph.from_dicts(degrees.people, degrees.movies)
+    queries = batch_queries()
+
+    start = time.perf_counter()
+    for source, target in queries:
+        degrees.shortest_path(source, target, graph=graph)
+    seconds = time.perf_counter() - start
+    print(f"one search per query: {len(queries) / seconds:10.1f} queries/s")
+
+    start = time.perf_counter()
+    batch.solve(queries, graph)
+    seconds = time.perf_counter() - start
+    print(f"batch.solve:          {len(queries) / seconds:10.1f} queries/s")
+
+
+def bench_parallel(edges):
+    """
+    Times batch.solve with 1 to cpu_count worker processes and checks
+    that every run gives the serial results.
+    """
+    synthetic_graph(edges)
+    graph = CompactGraph.from_dicts(degrees.people, degrees.movies)
+    queries = batch_queries()
+
+    start = time.perf_counter()
+    expected = batch.solve(queries, graph)
+    serial = time.perf_counter() - start
+    print(f"serial:    {serial:.3f}s")
+
+    workers = 1
+    while True:
+        start = time.perf_counter()
+        results = batch.solve(queries, graph, workers)
+        seconds = time.perf_counter() - start
+        match = "same" if results == expected else "DIFFERENT"
+        if CHECK:
+            assert results == expected, f"{workers} workers differ from serial"
+        print(f"{workers:>2} worker(s): {seconds:.3f}s "
+              f"(speedup {serial / seconds:.2f}x, {match} results)")
+        if workers >= multiprocessing.cpu_count():
+            break
+        workers = min(workers * 2, multiprocessing.cpu_count())
+
+
+def bench_loader(rows):
+    """
+    Compares load time and peak RSS of the original DictReader loader
+    and degrees.load_csv on generated CSV files with `rows` star rows.
+    Each loader runs in its own interpreter. Needs the Unix resource module.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Writing CSV files with {rows} star rows...")
+        write_random_csvs(directory, rows)
+        for loader in ("legacy", "streaming"):
+            output = subprocess.run(
+                [sys.executable, "-c", LOADER_SCRIPT, loader, directory],
+                cwd=here, check=True, capture_output=True, text=True).stdout
+            result = json.loads(output)
+
+            # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+            peak = result["peak"] * (1 if sys.platform == "darwin" else 1024)
+            print(f"{loader:>9}: {result['seconds']:.2f}s, "
+                  f"peak RSS {peak / 2**20:.0f} MiB")
+
+
+def bench_suite(edges):
+    """
+    Generates datasets at each of SUITE_SCALES times `edges` credits,
+    times load_data, neighbors_for_person and shortest_path in each
+    search mode (null when over BUDGET seconds), and writes the results
+    with the commit and platform to OUTPUT, so runs can be compared
+    across commits.
+    """
+    results = []
+    for scale in SUITE_SCALES:
+        credits = max(1, int(edges * scale))
+        result = {"credits": credits}
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            generate.generate(directory, credits)
+            result["generate_seconds"] = time.perf_counter() - start
+
+            clear_data()
+            start = time.perf_counter()
+            degrees.load_data(directory, cache=False)
+            result["load_seconds"] = time.perf_counter() - start
+        result["people"] = len(degrees.people)
+        result["movies"] = len(degrees.movies)
+        print(f"{credits} credits: loaded in {result['load_seconds']:.2f}s")
+
+        rng = random.Random(1)
+        people = list(degrees.people)
+        sample = [rng.choice(people) for _ in range(SUITE_NEIGHBORS)]
+        start = time.perf_counter()
+        neighbors = sum(len(degrees.neighbors_for_person(person_id))
+                        for person_id in sample)
+        seconds = time.perf_counter() - start
+        result["neighbors_us_per_call"] = seconds / len(sample) * 1e6
+        result["neighbors_per_call"] = neighbors / len(sample)
+        print(f"  neighbors_for_person: "
+              f"{result['neighbors_us_per_call']:.1f}us per call")
+
+        pairs = query_pairs(QUERIES)
+        graph = degrees.get_compact_graph()
+        result["queries"] = len(pairs)
+        for mode, options in (("frontier", {}),
+                              ("bidirectional", {"bidirectional": True}),
+                              ("compact", {"graph": graph})):
+            explored = 0
+            start = time.perf_counter()
+
+            # The frontier search is abandoned once it runs out of budget
+            frontier_class = with_deadline(DequeQueueFrontier, start + BUDGET)
+            try:
+                for source, target in pairs:
+                    stats = {}
+                    degrees.shortest_path(source, target, stats=stats,
+                                          frontier_class=frontier_class,
+                                          **options)
+                    explored += stats["explored_states"]
+            except TimeoutError:
+                result[f"{mode}_seconds_per_query"] = None
+                result[f"{mode}_explored_per_query"] = None
+                print(f"  {mode}: over the {BUDGET}s budget")
+                continue
+            seconds = time.perf_counter() - start
+            result[f"{mode}_seconds_per_query"] = seconds / len(pairs)
+            result[f"{mode}_explored_per_query"] = explored / len(pairs)
+            print(f"  {mode}: {seconds / len(pairs):.4f}s per query")
+        results.append(result)
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], check=True,
+                                capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    report = {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results,
+    }
+    with open(OUTPUT, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {OUTPUT}")
+
+
+# Benchmarks that can be selected from the command line
+BENCHMARKS = {
+    "frontier": bench_frontiers,
+    "bidirectional": bench_bidirectional,
+    "compact": bench_compact,
+    "snapshot": bench_snapshot,
+    "batch": bench_batch,
+    "parallel": bench_parallel,
+    "loader": bench_loader,
+    "landmarks": bench_landmarks,
+    "cache": bench_cache,
+    "names": bench_names,
+    "stats": bench_stats,
+    "delta": bench_delta,
+    "suite": bench_suite,
+}
+
+
+def main():
+    global CHECK, OUTPUT
+    if "--check" in sys.argv:
+        sys.argv.remove("--check")
+        CHECK = True
+    if "--output" in sys.argv:
+        i = sys.argv.index("--output")
+        if i + 1 >= len(sys.argv):
+            sys.exit("--output needs a file name")
+        OUTPUT = sys.argv[i + 1]
+        del sys.argv[i:i + 2]
+    usage = (f"Usage: python benchmark.py {'|'.join(BENCHMARKS)} "
+             "[edges] [--check] [--output FILE]")
+    if len(sys.argv) not in (2, 3) or sys.argv[1] not in BENCHMARKS:
+        sys.exit(usage)
+    if len(sys.argv) == 3:
+        try:
+            edges = int(sys.argv[2])
+        except ValueError:
+            sys.exit(usage)
+        if edges < 1:
+            sys.exit(usage)
+    else:
+        edges = LOADER_ROWS if sys.argv[1] == "loader" else EDGES
+    BENCHMARKS[sys.argv[1]](edges)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Cache of breadth-first search trees for repeated degrees queries.
+
+Each tree is kept by source person, so a later query from the same
+source is answered from the tree if it already reached the target, or
+by resuming the search where it stopped. Trees are evicted least
+recently used first once their total size exceeds a memory budget.
+When the graph is updated in place, only the trees that reached a
+changed person or movie are dropped.
+"""
+
+from collections import OrderedDict
+
+import degrees
+from graph import SearchTree
+
+# Default memory budget of the cached trees, in bytes
+BUDGET = 256 * 2**20
+
+
+class TreeCache():
+    """
+    Search trees of a CompactGraph, keyed by source person index.
+    Without a graph, the cache follows degrees.get_compact_graph() and
+    drops every tree if it is replaced. `invalidations` counts the trees
+    dropped because of changes to the graph.
+    """
+
+    def __init__(self, graph=None, budget=BUDGET):
+        self.follow = graph is None
+        self.graph = graph
+        self.version = None if graph is None else graph.version
+        self.budget = budget
+        self.trees = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.resumes = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def current_graph(self):
+        """
+        Returns the graph the trees belong to, first dropping every tree
+        if the cache follows the loaded graph and it was replaced, and the
+        trees that changes to the graph since the last call affect.
+        """
+        if self.follow:
+            graph = degrees.get_compact_graph()
+            if graph is not self.graph:
+                self.invalidations += len(self.trees)
+                self.invalidate()
+                self.graph = graph
+                self.version = graph.version
+        graph = self.graph
+        if graph.version != self.version:
+            changes = graph.changes_since(self.version)
+            if changes is not None:
+                people = {person for _, person, _ in changes if person != -1}
+                movies = {movie for _, _, movie in changes if movie != -1}
+            for source, tree in list(self.trees.items()):
+                if changes is None or tree.affected_by(people, movies):
+                    self.invalidations += 1
+                    self.invalidate(source)
+                else:
+                    self.nbytes -= tree.nbytes()
+                    tree.resize()
+                    self.nbytes += tree.nbytes()
+            self.version = graph.version
+        return graph
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Same contract as degrees.shortest_path on the cached graph.
+        """
+        graph = self.current_graph()
+        person_index = graph.person_index
+        if source not in person_index or target not in person_index:
+            return None
+        paths = self.index_paths_from(person_index[source],
+                                      [person_index[target]], stats)
+        path = paths[person_index[target]]
+        if path is None:
+            return None
+        return [(graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in path]
+
+    def index_paths_from(self, source, targets, stats=None):
+        """
+        Same contract as CompactGraph.index_paths_from, using and
+        updating the cached tree of `source`.
+        """
+        graph = self.current_graph()
+        tree = self.trees.get(source)
+        if tree is None:
+            self.misses += 1
+            tree = SearchTree(graph, source)
+        elif tree.complete() or all(tree.reached(t) for t in targets):
+            self.hits += 1
+            self.trees.move_to_end(source)
+        else:
+            self.resumes += 1
+            self.nbytes -= tree.nbytes()
+            del self.trees[source]
+
+        explored_states = tree.explored_states
+        if source not in self.trees:
+            tree.grow(targets)
+            self._store(source, tree)
+        if stats is not None:
+            stats["explored_states"] = tree.explored_states - explored_states
+        return {target: tree.path_to(target) for target in targets}
+
+    def invalidate(self, source=None):
+        """
+        Drops the tree of one source index, or every tree.
+        """
+        if source is None:
+            self.trees.clear()
+            self.nbytes = 0
+        elif source in self.trees:
+            self.nbytes -= self.trees.pop(source).nbytes()
+
+    def stats(self):
+        """
+        Returns the cache counters as a dict.
+        """
+        return {"trees": len(self.trees), "nbytes": self.nbytes,
+                "budget": self.budget, "hits": self.hits,
+                "resumes": self.resumes, "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations}
+
+    def _store(self, source, tree):
+        """
+        Adds a tree as the most recently used, evicting the least
+        recently used trees until the cache fits its budget.
+        """
+        size = tree.nbytes()
+        if size > self.budget:
+            return
+        self.trees[source] = tree
+        self.nbytes += size
+        while self.nbytes > self.budget:
+            _, evicted = self.trees.popitem(last=False)
+            self.nbytes -= evicted.nbytes()
+            self.evictions += 1
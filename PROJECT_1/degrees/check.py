@@ -0,0 +1,573 @@
+"""
+Consistency checks for the degrees search modes and data structures.
+
+Usage: python check.py [directory]
+
+Runs every check against the dataset in `directory` (default "small")
+and against a seeded synthetic graph, and exits with an error on the
+first mismatch.
+"""
+
+import contextlib
+import copy
+import io
+import math
+import random
+import os
+import shutil
+import sys
+import tempfile
+
+import batch
+import benchmark
+import degrees
+import generate
+import graph as compact
+import snapshot
+from stats import SearchStats
+from cache import TreeCache
+from graph import CompactGraph
+from landmarks import LandmarkIndex
+
+# Number of random pairs checked on the synthetic graph
+SYNTHETIC_QUERIES = 400
+
+# Number of small random graphs whose paths are enumerated by brute force
+RANDOM_GRAPHS = 20
+
+
+def check_path(source, target, path):
+    """
+    Raises AssertionError unless `path` is a valid list of
+    (movie_id, person_id) pairs leading from source to target.
+    """
+    person = source
+    for movie_id, person_id in path:
+        stars = degrees.movies[movie_id]["stars"]
+        assert person in stars and person_id in stars, \
+            f"{person} and {person_id} did not star in {movie_id}"
+        person = person_id
+    assert person == target, f"path ends at {person}, not {target}"
+
+
+def check_search(pairs):
+    """
+    Checks that the dict, bidirectional, CSR and CSR-bidirectional
+    searches agree on connectivity and length, and return valid paths.
+    """
+    graph = CompactGraph.from_dicts(degrees.people, degrees.movies)
+    for source, target in pairs:
+        expected = degrees.shortest_path(source, target)
+        for bidirectional in (False, True):
+            for model in (None, graph):
+                path = degrees.shortest_path(source, target,
+                                             bidirectional=bidirectional,
+                                             graph=model)
+                assert (path is None) == (expected is None), (source, target)
+                if path is not None:
+                    assert len(path) == len(expected), (source, target)
+                    check_path(source, target, path)
+
+
+def simple_paths(source, target):
+    """
+    Returns every list of (movie_id, person_id) pairs leading from source
+    to target without repeating a person, by depth-first enumeration.
+    """
+    paths = []
+
+    def extend(person, path, visited):
+        if person == target:
+            paths.append(path)
+            return
+        for movie_id, person_id in degrees.neighbors_for_person(person):
+            if person_id not in visited:
+                extend(person_id, path + [(movie_id, person_id)],
+                       visited | {person_id})
+
+    extend(source, [], {source})
+    return paths
+
+
+def check_paths(pairs):
+    """
+    Checks all_shortest_paths, k_shortest_paths and shortest_path_dag
+    against every simple path between each pair.
+    """
+    for source, target in pairs:
+        paths = sorted(tuple(path) for path in simple_paths(source, target))
+        dag = degrees.shortest_path_dag(source, target)
+        if not paths:
+            assert dag is None, (source, target)
+            assert not list(degrees.all_shortest_paths(source, target))
+            assert not list(degrees.k_shortest_paths(source, target, 3))
+            continue
+
+        # Every shortest path, each once, and the target's predecessors
+        length = min(len(path) for path in paths)
+        shortest = [path for path in paths if len(path) == length]
+        found = sorted(tuple(path)
+                       for path in degrees.all_shortest_paths(source, target))
+        assert found == shortest, (source, target)
+        if length > 0:
+            previous = {(path[-1][0], path[-2][1] if length > 1 else source)
+                        for path in shortest}
+            assert set(dag[target]) == previous, (source, target)
+            assert len(dag[target]) == len(previous), (source, target)
+
+        # The k shortest simple paths, each once, in order of length
+        lengths = sorted(len(path) for path in paths)
+        for k in (1, 3, len(paths) + 1):
+            found = [tuple(path)
+                     for path in degrees.k_shortest_paths(source, target, k)]
+            assert len(set(found)) == len(found), (source, target, k)
+            assert set(found) <= set(paths), (source, target, k)
+            assert [len(path) for path in found] == lengths[:k], \
+                (source, target, k)
+
+
+def random_graph(seed, num_people=8, num_movies=6):
+    """
+    Fills degrees.people, degrees.movies and degrees.names with a small
+    random graph, with two or three stars in each movie.
+    """
+    rng = random.Random(seed)
+    benchmark.clear_data()
+    for i in range(num_people):
+        person_id = str(i)
+        name = f"person {i}"
+        degrees.people[person_id] = {"name": name, "birth": "", "movies": set()}
+        degrees.names[name] = {person_id}
+    for i in range(num_movies):
+        movie_id = str(i)
+        stars = set(rng.sample(sorted(degrees.people), rng.randint(2, 3)))
+        degrees.movies[movie_id] = {"title": f"movie {i}", "year": "",
+                                    "stars": stars}
+        for person_id in stars:
+            degrees.people[person_id]["movies"].add(movie_id)
+
+
+def check_landmarks(pairs, count=4):
+    """
+    Checks that landmark bounds contain the true separation and that the
+    landmark A* search finds paths of the breadth-first length, also
+    after a save and load round trip, and that a saved index is not
+    loaded for a graph with the same people but other credits.
+    """
+    graph = degrees.get_compact_graph()
+    index = LandmarkIndex.build(graph, count)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "landmarks.index")
+        index.save(filename)
+        loaded = LandmarkIndex.load(filename, graph)
+
+        # Move one credit of a person to a movie they were not in
+        movies = copy.deepcopy(degrees.movies)
+        movie_ids = list(movies)
+        for movie_id in movie_ids:
+            if movies[movie_id]["stars"]:
+                star = movies[movie_id]["stars"].pop()
+                other = next((m for m in movie_ids
+                              if star not in movies[m]["stars"]), movie_id)
+                movies[other]["stars"].add(star)
+                break
+        people = {person_id: {"movies": set()} for person_id in degrees.people}
+        for movie_id, movie in movies.items():
+            for person_id in movie["stars"]:
+                people[person_id]["movies"].add(movie_id)
+        changed = CompactGraph.from_dicts(people, movies)
+        if changed.signature() != graph.signature():
+            assert LandmarkIndex.load(filename, changed) is None
+    assert loaded is not None and loaded.landmarks == index.landmarks
+    assert loaded.distances == index.distances
+
+    for source, target in pairs:
+        expected = degrees.shortest_path(source, target, graph=graph)
+        lower, upper = index.bounds_for(graph, source, target)
+        if expected is None:
+            assert math.inf in (lower, upper), (source, target)
+        else:
+            assert lower <= len(expected) <= upper, (source, target)
+        path = degrees.shortest_path(source, target, landmarks=index)
+        assert (path is None) == (expected is None), (source, target)
+        if path is not None:
+            assert len(path) == len(expected), (source, target)
+            check_path(source, target, path)
+
+
+def check_tree_cache(pairs):
+    """
+    Checks that cached, resumed and evicted search trees answer like
+    a fresh search, and that the counters add up.
+    """
+    graph = degrees.get_compact_graph()
+    for budget in (None, 1):
+        trees = TreeCache(graph) if budget is None else TreeCache(graph, budget)
+        for source, target in pairs:
+            expected = degrees.shortest_path(source, target, graph=graph)
+            path = degrees.shortest_path(source, target, trees=trees)
+            assert (path is None) == (expected is None), (source, target)
+            if path is not None:
+                assert len(path) == len(expected), (source, target)
+                check_path(source, target, path)
+        counters = trees.stats()
+        assert counters["hits"] + counters["resumes"] + counters["misses"] \
+            <= len(pairs)
+        assert counters["nbytes"] <= trees.budget
+        if budget == 1:
+            assert counters["trees"] == 0 and counters["hits"] == 0
+
+
+def check_names():
+    """
+    Checks that every loaded name is found first by its exact, padded or
+    differently cased form, and by a prefix and a one-letter typo, and
+    that person_id_for_name offers the matches of a name it does not know.
+    """
+    index = degrees.get_name_index()
+    for key, person_ids in degrees.names.items():
+        assert index.search(key)[0] == key, key
+        assert index.search(f"  {key.upper()} ")[0] == key, key
+        assert key in index.search(key[:len(key) // 2 + 1]), key
+        typo = key[:1] + key[2:]
+        assert key in index.search(typo), (key, typo)
+        assert set(degrees.person_ids_for_query(key)[:len(person_ids)]) \
+            == person_ids, key
+    assert index.search("") == []
+
+    # Answer the prompt with the person whose name was misspelled
+    for key, person_ids in degrees.names.items():
+        typo = key[:1] + key[2:]
+        if typo in degrees.names:
+            continue
+        person_id = min(person_ids)
+        degrees.input = lambda prompt: person_id
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                assert degrees.person_id_for_name(typo) == person_id, typo
+        finally:
+            del degrees.input
+
+
+def check_stats(pairs):
+    """
+    Checks that a SearchStats gets the same explored states as a plain
+    dict in every search mode, and emits one complete record per search.
+    """
+    graph = degrees.get_compact_graph()
+    records = []
+    traced = SearchStats(records.append)
+    for source, target in pairs:
+        for bidirectional, model in ((False, None), (True, None), (False, graph)):
+            plain = {}
+            expected = degrees.shortest_path(source, target, stats=plain,
+                                             bidirectional=bidirectional,
+                                             graph=model)
+            path = degrees.shortest_path(source, target, stats=traced,
+                                         bidirectional=bidirectional,
+                                         graph=model)
+            assert path == expected, (source, target)
+            record = records[-1]
+            assert record["explored_states"] == plain["explored_states"]
+            assert record["degrees"] == (None if path is None else len(path))
+            assert record["seconds"] >= sum(record["layer_seconds"])
+            if model is None and not bidirectional and path is not None:
+                assert len(record["layer_seconds"]) == len(path)
+    assert len(records) == 3 * len(pairs)
+
+
+def check_updates():
+    """
+    Checks that a delta file applied to the loaded "small" data updates
+    the searches, the name index, and the CompactGraph in place with a
+    TreeCache and a LandmarkIndex following it, that trees the changes
+    do not reach are kept, and that undoing it restores the original
+    answers.
+    """
+    before = {pair: degrees.shortest_path(*pair) for pair in all_pairs()}
+    names_before = copy.deepcopy(degrees.names)
+    index = degrees.get_name_index()
+    graph = degrees.get_compact_graph()
+    trees = TreeCache()
+    landmarks = LandmarkIndex.build(graph, 2)
+    assert trees.shortest_path("102", "914612") is None
+    assert degrees.shortest_path("102", "914612", landmarks=landmarks) is None
+
+    with tempfile.TemporaryDirectory() as directory:
+        delta = os.path.join(directory, "delta.csv")
+        with open(delta, "w", encoding="utf-8") as f:
+            f.write("op,person_id,movie_id,name,year\n"
+                    "add,,241527,Harry Potter,2001\n"
+                    "add,10990,,Daniel Radcliffe,1989\n"
+                    "add,10990,241527,,\n"
+                    "add,914612,241527,,\n"
+                    "add,158,241527,,\n")
+        assert degrees.apply_delta(delta) == 5
+
+        assert degrees.get_compact_graph() is graph
+        path = trees.shortest_path("102", "914612")
+        assert path is not None and len(path) == 2, path
+        check_path("102", "914612", path)
+        assert trees.stats()["invalidations"] == 1
+        path = degrees.shortest_path("102", "914612", landmarks=landmarks)
+        assert path is not None and len(path) == 2, path
+        check_search(all_pairs())
+        assert index.search("daniel radclife")[0] == "daniel radcliffe"
+
+        # People and credits the cached tree never reached leave it alone
+        degrees.add_person("10991", "Rupert Grint", "1988")
+        degrees.add_movie("241528", "Chamber of Secrets", "2002")
+        degrees.add_star("10991", "241528")
+        assert trees.shortest_path("102", "914612") == path
+        assert trees.stats()["trees"] == 1
+        assert trees.stats()["invalidations"] == 1
+        degrees.remove_movie("241528")
+        degrees.remove_person("10991")
+
+        with open(delta, "w", encoding="utf-8") as f:
+            f.write("op,person_id,movie_id,name,year\n"
+                    "remove,158,241527,,\n"
+                    "remove,10990,,,\n"
+                    "remove,,241527,,\n"
+                    "remove,,241527,,\n")
+        try:
+            degrees.apply_delta(delta)
+        except ValueError as e:
+            assert str(e).endswith(":5: movie not found: 241527"), e
+        else:
+            raise AssertionError("removing a missing movie succeeded")
+
+    assert trees.shortest_path("102", "914612") is None
+    assert degrees.shortest_path("102", "914612", landmarks=landmarks) is None
+    assert "daniel radcliffe" not in index.search("daniel radcliffe")
+    assert degrees.names == names_before
+    after = {pair: degrees.shortest_path(*pair) for pair in all_pairs()}
+    assert after == before
+
+
+def check_incremental(seed, steps=100):
+    """
+    Checks that random updates patched into the CompactGraph of a small
+    random graph keep its rows equal to the dicts, and its searches, a
+    TreeCache and a LandmarkIndex following it in agreement with the
+    search on the dicts, while overflow rows are compacted and the
+    change log trimmed often.
+    """
+    rng = random.Random(seed)
+    random_graph(seed)
+    graph = degrees.get_compact_graph()
+    trees = TreeCache()
+    landmarks = LandmarkIndex.build(graph, 2)
+    limits = compact.OVERFLOW_ROWS, compact.LOG_CHANGES
+    compact.OVERFLOW_ROWS, compact.LOG_CHANGES = 4, 8
+    try:
+        for step in range(steps):
+            people = sorted(degrees.people)
+            movies = sorted(degrees.movies)
+            op = rng.randrange(6)
+            if op == 0:
+                degrees.add_person(f"p{step}", f"new person {step}")
+            elif op == 1 and len(people) > 2:
+                degrees.remove_person(rng.choice(people))
+            elif op == 2 or not movies:
+                degrees.add_movie(f"m{step}", f"new movie {step}")
+            elif op == 3:
+                degrees.remove_movie(rng.choice(movies))
+            elif op == 4:
+                degrees.add_star(rng.choice(people), rng.choice(movies))
+            else:
+                person_id = rng.choice(people)
+                credits = sorted(degrees.people[person_id]["movies"])
+                if credits:
+                    degrees.remove_star(person_id, rng.choice(credits))
+
+            assert degrees.get_compact_graph() is graph
+            for person_id, person in degrees.people.items():
+                row = graph.movies_for(graph.person_index[person_id])
+                assert {graph.movie_ids[m] for m in row} == person["movies"]
+            for movie_id, movie in degrees.movies.items():
+                row = graph.stars_for(graph.movie_index[movie_id])
+                assert {graph.person_ids[p] for p in row} == movie["stars"]
+
+            # Search between runs of updates, so some outrun the log
+            if step % 5 != 4:
+                continue
+            for source, target in all_pairs():
+                expected = degrees.shortest_path(source, target)
+                for path in (graph.shortest_path(source, target),
+                             trees.shortest_path(source, target),
+                             landmarks.shortest_path(graph, source, target)):
+                    assert (path is None) == (expected is None), \
+                        (seed, step, source, target)
+                    if path is not None:
+                        assert len(path) == len(expected), \
+                            (seed, step, source, target)
+                        check_path(source, target, path)
+    finally:
+        compact.OVERFLOW_ROWS, compact.LOG_CHANGES = limits
+
+
+def check_generate(credits=5000):
+    """
+    Checks that the generator is deterministic, writes the requested
+    number of credits, and that the search modes agree on its output.
+    """
+    with tempfile.TemporaryDirectory() as first, \
+            tempfile.TemporaryDirectory() as second:
+        counts = generate.generate(first, credits, seed=7)
+        assert generate.generate(second, credits, seed=7) == counts
+        assert counts[2] == credits, counts
+        for filename in snapshot.CSV_FILES:
+            with open(os.path.join(first, filename), "rb") as a, \
+                    open(os.path.join(second, filename), "rb") as b:
+                assert a.read() == b.read(), filename
+
+        benchmark.clear_data()
+        degrees.load_data(first, cache=False)
+        assert len(degrees.people) == counts[0]
+        assert len(degrees.movies) == counts[1]
+        assert sum(len(person["movies"]) for person in degrees.people.values()) \
+            == credits
+    check_search(benchmark.query_pairs(SYNTHETIC_QUERIES // 10, seed=5))
+
+
+def check_snapshot(directory):
+    """
+    Checks that a cold load (which writes the snapshot) and a warm load
+    (which reads it) of a copy of `directory` give the same data, and
+    that the snapshot is ignored once a CSV file changes.
+    """
+    with tempfile.TemporaryDirectory() as copy_directory:
+        for filename in snapshot.CSV_FILES:
+            shutil.copy(os.path.join(directory, filename), copy_directory)
+
+        benchmark.clear_data()
+        degrees.load_data(copy_directory)
+        cold = copy.deepcopy((degrees.names, degrees.people, degrees.movies))
+        assert snapshot.load(copy_directory) is not None, "no snapshot written"
+
+        benchmark.clear_data()
+        degrees.load_data(copy_directory)
+        warm = (degrees.names, degrees.people, degrees.movies)
+        assert warm == cold, "warm load differs from cold load"
+
+        with open(os.path.join(copy_directory, "stars.csv"), "a") as f:
+            f.write("\n")
+        assert snapshot.load(copy_directory) is None, "stale snapshot loaded"
+
+
+def check_snapshot_strings():
+    """
+    Checks that strings with separators, quotes and non-ASCII characters
+    survive a snapshot round trip.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "people.csv"), "w",
+                  encoding="utf-8") as f:
+            f.write('id,name,birth\n102,"Kevin\x00Bacon",1958\n'
+                    '129,"Tom ""T"" Cruise",\n130,Zoë,\n')
+        with open(os.path.join(directory, "movies.csv"), "w",
+                  encoding="utf-8") as f:
+            f.write('id,title,year\n1,"A, B",\n2,,1999\n')
+        with open(os.path.join(directory, "stars.csv"), "w",
+                  encoding="utf-8") as f:
+            f.write("person_id,movie_id\n102,1\n129,1\n130,2\n")
+        check_snapshot(directory)
+
+
+def check_batch():
+    """
+    Checks that batch queries are parsed, resolved and answered like
+    single shortest_path calls, and that bad lines only fail themselves.
+    """
+    lines = [
+        "Kevin Bacon\tTom Hanks\n",
+        "102,705\n",
+        "\n",
+        '"Bacon, Kevin",102\n',
+        "102,129,158\n",
+        "Kevin Bacon\n",
+        "102\t102\n",
+    ]
+    results = batch.solve(batch.read_queries(lines),
+                          degrees.get_compact_graph())
+    assert len(results) == 6, results
+    assert results[0]["source_id"] == "102" and results[0]["degrees"] == 1
+    check_path("102", "705", results[1]["path"])
+    assert results[1]["degrees"] == len(degrees.shortest_path("102", "705"))
+    assert results[2]["error"] == "person not found: Bacon, Kevin"
+    assert "error" in results[3] and "error" in results[4]
+    assert results[5]["degrees"] == 0 and results[5]["path"] == []
+
+
+def check_parallel(pairs, workers=2):
+    """
+    Checks that the process-pool batch solver returns exactly the
+    serial results.
+    """
+    queries = [list(pair) for pair in pairs]
+    graph = degrees.get_compact_graph()
+    expected = batch.solve(queries, graph)
+    assert batch.solve(queries, graph, workers) == expected
+    assert batch.solve([], graph, workers) == []
+
+
+def all_pairs():
+    """
+    Returns every (source, target) pair of the loaded people.
+    """
+    return [(source, target) for source in degrees.people
+            for target in degrees.people]
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python check.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "small"
+
+    degrees.load_data(directory, cache=False)
+    check_search(all_pairs())
+    check_landmarks(all_pairs())
+    check_tree_cache(all_pairs())
+    check_stats(all_pairs())
+    print(f"search modes agree on {directory}")
+    check_names()
+    print("names found by exact, prefix and misspelled queries")
+
+    if directory == "small":
+        check_batch()
+        check_parallel(all_pairs())
+        print("batch queries answered, serially and in parallel")
+        check_updates()
+        print("delta files applied and undone")
+        check_paths(all_pairs())
+        print("path enumerations agree with brute force on small")
+
+    check_snapshot(directory)
+    check_snapshot_strings()
+    print("snapshot round trips")
+
+    for seed in range(RANDOM_GRAPHS):
+        random_graph(seed)
+        check_paths(all_pairs())
+    print(f"path enumerations agree with brute force on {RANDOM_GRAPHS} "
+          "random graphs")
+    for seed in range(RANDOM_GRAPHS):
+        check_incremental(seed)
+    print(f"in-place updates agree with the dicts on {RANDOM_GRAPHS} "
+          "random graphs")
+
+    benchmark.synthetic_graph(20000)
+    check_search(benchmark.query_pairs(SYNTHETIC_QUERIES, seed=1))
+    check_landmarks(benchmark.query_pairs(SYNTHETIC_QUERIES, seed=3))
+    pairs = benchmark.query_pairs(SYNTHETIC_QUERIES, seed=4)
+    check_tree_cache(pairs + [(target, source) for source, target in pairs])
+    check_parallel(benchmark.query_pairs(SYNTHETIC_QUERIES, seed=2))
+    print(f"search modes agree on {SYNTHETIC_QUERIES} synthetic queries")
+
+    check_generate()
+    print("generated datasets are reproducible")
+
+
+if __name__ == "__main__":
+    main()
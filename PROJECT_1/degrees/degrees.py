@@ -1,7 +1,15 @@
 import csv
+import heapq
+import itertools
+import operator
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+import snapshot
+from graph import CompactGraph
+from names import NameIndex
+from stats import SearchStats
+from util import Node, DequeQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,44 +20,299 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# CompactGraph of the same data, set by load_data when it reads or writes
+# a snapshot, and otherwise built on first use by get_compact_graph
+compact_graph = None
 
-def load_data(directory):
+# NameIndex of the keys of names, built on first use by get_name_index
+name_index = None
+
+# Bytes read from a CSV file at a time
+READ_BUFFER_SIZE = 1 << 20
+
+
+def load_data(directory, cache=True):
     """
     Load data from CSV files into memory.
+
+    With `cache`, the binary snapshot next to the CSV files is loaded
+    instead when it is up to date, and rewritten after parsing otherwise.
+    """
+    global compact_graph, name_index
+
+    name_index = None
+    loaded = snapshot.load(directory) if cache else None
+    if loaded is not None:
+        compact_graph, columns = loaded
+        load_snapshot(compact_graph, columns)
+        return
+
+    load_csv(directory)
+    compact_graph = None
+    if cache:
+        compact_graph = CompactGraph.from_dicts(people, movies)
+        try:
+            snapshot.write(directory, compact_graph, people, movies)
+        except OSError:
+            pass
+
+
+def get_compact_graph():
+    """
+    Returns the CompactGraph of the loaded data, building it if needed.
     """
+    global compact_graph
+    if compact_graph is None:
+        compact_graph = CompactGraph.from_dicts(people, movies)
+    return compact_graph
+
+
+def get_name_index():
+    """
+    Returns the NameIndex of the loaded names, building it if needed.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex.build(names)
+    return name_index
+
+
+def load_csv(directory):
+    """
+    Fill names, people and movies from the CSV files,
+    streaming each file once.
+    """
+
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+    intern = sys.intern
+    for person_id, name, birth in read_rows(f"{directory}/people.csv",
+                                            ("id", "name", "birth")):
+        person_id = intern(person_id)
+        people[person_id] = {
+            "name": name,
+            "birth": birth,
+            "movies": set()
+        }
+        key = name.lower()
+        if key not in names:
+            names[key] = {person_id}
+        else:
+            names[key].add(person_id)
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
+    for movie_id, title, year in read_rows(f"{directory}/movies.csv",
+                                           ("id", "title", "year")):
+        movies[intern(movie_id)] = {
+            "title": title,
+            "year": year,
+            "stars": set()
+        }
 
     # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+    for person_id, movie_id in read_rows(f"{directory}/stars.csv",
+                                         ("person_id", "movie_id")):
+        person = people.get(person_id)
+        movie = movies.get(movie_id)
+        if person is not None and movie is not None:
+            person["movies"].add(intern(movie_id))
+            movie["stars"].add(intern(person_id))
+
+
+def read_rows(filename, columns):
+    """
+    Yields a tuple of the given columns (at least two) for every row of
+    a CSV file, reading the file through a large buffer.
+    """
+    with open(filename, encoding="utf-8", newline="",
+              buffering=READ_BUFFER_SIZE) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        positions = [header.index(column) for column in columns]
+        width = max(positions) + 1
+        select = operator.itemgetter(*positions)
+        for row in reader:
+            if len(row) >= width:
+                yield select(row)
+
+
+def load_snapshot(graph, columns):
+    """
+    Fill names, people and movies from a snapshot's graph and columns.
+    """
+    movie_ids = graph.movie_ids
+    for i, person_id in enumerate(graph.person_ids):
+        name = columns["names"][i]
+        people[person_id] = {
+            "name": name,
+            "birth": columns["births"][i],
+            "movies": {movie_ids[movie] for movie in graph.movies_for(i)}
+        }
+        names.setdefault(name.lower(), set()).add(person_id)
+
+    person_ids = graph.person_ids
+    for i, movie_id in enumerate(movie_ids):
+        movies[movie_id] = {
+            "title": columns["titles"][i],
+            "year": columns["years"][i],
+            "stars": {person_ids[person] for person in graph.stars_for(i)}
+        }
+
+
+def add_person(person_id, name, birth=""):
+    """
+    Adds a person without any movies. Raises ValueError if the
+    person_id is already loaded.
+    """
+    if person_id in people:
+        raise ValueError(f"person already exists: {person_id}")
+    person_id = sys.intern(person_id)
+    people[person_id] = {"name": name, "birth": birth, "movies": set()}
+    key = name.lower()
+    names.setdefault(key, set()).add(person_id)
+    if name_index is not None:
+        name_index.add(key)
+    if compact_graph is not None:
+        compact_graph.add_person(person_id)
+
+
+def remove_person(person_id):
+    """
+    Removes a person and their star credits. Raises LookupError if
+    there is no such person.
+    """
+    person = people.pop(person_id, None)
+    if person is None:
+        raise LookupError(f"person not found: {person_id}")
+    for movie_id in person["movies"]:
+        movies[movie_id]["stars"].discard(person_id)
+    key = person["name"].lower()
+    names[key].discard(person_id)
+    if not names[key]:
+        del names[key]
+        if name_index is not None:
+            name_index.remove(key)
+    if compact_graph is not None:
+        compact_graph.remove_person(person_id)
+
+
+def add_movie(movie_id, title, year=""):
+    """
+    Adds a movie without any stars. Raises ValueError if the movie_id
+    is already loaded.
+    """
+    if movie_id in movies:
+        raise ValueError(f"movie already exists: {movie_id}")
+    movies[sys.intern(movie_id)] = {"title": title, "year": year, "stars": set()}
+    if compact_graph is not None:
+        compact_graph.add_movie(movie_id)
+
+
+def remove_movie(movie_id):
+    """
+    Removes a movie and its star credits. Raises LookupError if there
+    is no such movie.
+    """
+    movie = movies.pop(movie_id, None)
+    if movie is None:
+        raise LookupError(f"movie not found: {movie_id}")
+    for person_id in movie["stars"]:
+        people[person_id]["movies"].discard(movie_id)
+    if compact_graph is not None:
+        compact_graph.remove_movie(movie_id)
+
+
+def add_star(person_id, movie_id):
+    """
+    Records that a person starred in a movie. Raises LookupError if
+    either is not loaded.
+    """
+    person, movie = _credit(person_id, movie_id)
+    person["movies"].add(sys.intern(movie_id))
+    movie["stars"].add(sys.intern(person_id))
+    if compact_graph is not None:
+        compact_graph.add_star(person_id, movie_id)
+
+
+def remove_star(person_id, movie_id):
+    """
+    Removes a star credit. Raises LookupError if either the person or
+    the movie is not loaded.
+    """
+    person, movie = _credit(person_id, movie_id)
+    person["movies"].discard(movie_id)
+    movie["stars"].discard(person_id)
+    if compact_graph is not None:
+        compact_graph.remove_star(person_id, movie_id)
+
+
+def _credit(person_id, movie_id):
+    """
+    Returns the people and movies entries of a star credit.
+    """
+    if person_id not in people:
+        raise LookupError(f"person not found: {person_id}")
+    if movie_id not in movies:
+        raise LookupError(f"movie not found: {movie_id}")
+    return people[person_id], movies[movie_id]
+
+
+def data_changed():
+    """
+    Drops the structures derived from the people and movies dicts, for
+    callers that change the dicts directly rather than through the
+    update functions above, which patch the CompactGraph in place. The
+    CompactGraph is rebuilt on its next use, and a cache.TreeCache
+    following the loaded graph drops its trees when it sees the new one.
+    """
+    global compact_graph
+    compact_graph = None
+
+
+def apply_delta(filename):
+    """
+    Applies the updates of a delta CSV file, in order, and returns how
+    many were applied. Its columns are op (add or remove), person_id,
+    movie_id, name and year: a row with only a person_id adds a person
+    (name and year being name and birth) or removes one, a row with
+    only a movie_id does the same for a movie (title and year), and a
+    row with both adds or removes a star credit.
+
+    Raises ValueError naming the line of the first row that cannot be
+    applied; the rows before it stay applied.
+    """
+    applied = 0
+    with open(filename, encoding="utf-8", newline="") as f:
         reader = csv.DictReader(f)
         for row in reader:
+            op = row.get("op")
+            person_id = row.get("person_id") or ""
+            movie_id = row.get("movie_id") or ""
+            name = row.get("name") or ""
+            year = row.get("year") or ""
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+                if op not in ("add", "remove"):
+                    raise ValueError(f"unknown op: {op!r}")
+                if person_id and movie_id:
+                    if op == "add":
+                        add_star(person_id, movie_id)
+                    else:
+                        remove_star(person_id, movie_id)
+                elif person_id:
+                    if op == "add":
+                        add_person(person_id, name, year)
+                    else:
+                        remove_person(person_id)
+                elif movie_id:
+                    if op == "add":
+                        add_movie(movie_id, name, year)
+                    else:
+                        remove_movie(movie_id)
+                else:
+                    raise ValueError("expected a person_id or a movie_id")
+            except (LookupError, ValueError) as e:
+                raise ValueError(f"{filename}:{reader.line_num}: {e}") from e
+            applied += 1
+    return applied
 
 
 def main():
@@ -84,21 +347,58 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, frontier_class=DequeQueueFrontier,
+                  bidirectional=False, stats=None, graph=None, landmarks=None,
+                  trees=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    `frontier_class` is the queue frontier used for the search; any
+    class from util with the same interface can be passed.
+    With `bidirectional`, the search grows from both people at once.
+    If `stats` is a dict, the number of explored states is stored in it;
+    a stats.SearchStats also gets the timings and frontier sizes of the
+    search, and emits them as a record when it finishes.
+    If `graph` is a graph.CompactGraph, the search runs on it instead of
+    on the `people` and `movies` dicts.
+    If `landmarks` is a landmarks.LandmarkIndex, the search runs on the
+    compact graph as an A* search guided and pruned by its bounds.
+    If `trees` is a cache.TreeCache, the search tree of the source is
+    reused from it, or resumed, and kept for later queries.
     """
-    
+    if isinstance(stats, SearchStats) and not stats.running():
+        stats.start(source=source, target=target)
+        path = shortest_path(source, target, frontier_class, bidirectional,
+                             stats, graph, landmarks, trees)
+        stats.finish(degrees=None if path is None else len(path))
+        return path
+    tracing = isinstance(stats, SearchStats)
+
+    if trees is not None:
+        return trees.shortest_path(source, target, stats)
+    if landmarks is not None:
+        if graph is None:
+            graph = get_compact_graph()
+        return landmarks.shortest_path(graph, source, target, stats)
+    if graph is not None:
+        return graph.shortest_path(source, target, bidirectional, stats)
+    if bidirectional:
+        return bidirectional_shortest_path(source, target, stats)
+
     # Number of states explored
     explored_states = 0
 
     # Starting position of the frontier (1st person)
     start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
+    frontier = frontier_class()
     frontier.add(start)
+
+    # Depth of every state added, to time each layer when tracing
+    depths = {source: 0}
+    depth = 0
     
     # Empty explored set
     explored_set = set()
@@ -107,55 +407,409 @@ def shortest_path(source, target):
 
         # If frontier is empty, then there is no path between the two people
         if frontier.empty():
-            return None
+            solution = None
+            break
 
         # A node from the frontier
         node = frontier.remove()
         explored_states += 1
+        if tracing and depths[node.state] > depth:
+            depth = depths[node.state]
+            stats.layer()
 
         # If node = goal, then solution
         if node.state == target:
-            solution = []
-            while node.parent is not None:
-                solution.append((node.action, node.state))
-                node = node.parent
-            solution.reverse()
-            return solution
+            solution = solution_for(node)
+            break
 
         # Node marked as explored
         explored_set.add(node.state)
 
         # Neighbors to add to the frontier
-        for movie, person in neighbors_for_person(node.state):
+        if tracing:
+            started = time.perf_counter()
+            neighbors = neighbors_for_person(node.state)
+            stats.neighbors(time.perf_counter() - started)
+        else:
+            neighbors = neighbors_for_person(node.state)
+        for movie, person in neighbors:
             if not frontier.contains_state(person) and person not in explored_set:
                 child = Node(state=person, parent=node, action=movie)
                 frontier.add(child)
+                if tracing:
+                    depths[person] = depth + 1
+        if tracing:
+            stats.frontier(len(frontier))
+
+    if stats is not None:
+        stats["explored_states"] = explored_states
+    return solution
+
+
+def shortest_paths_from(source, targets, graph=None):
+    """
+    Returns a dict mapping each person_id in `targets` to the shortest
+    list of (movie_id, person_id) pairs from the source, or None,
+    answering all of them with a single breadth-first search.
+    """
+    if graph is not None:
+        return graph.paths_from(source, targets)
+
+    # Node of every person reached so far
+    start = Node(state=source, parent=None, action=None)
+    reached = {source: start}
+    frontier = DequeQueueFrontier()
+    frontier.add(start)
+
+    remaining = set(targets)
+    remaining.discard(source)
+
+    while remaining and not frontier.empty():
+        node = frontier.remove()
+        for movie, person in neighbors_for_person(node.state):
+            if person not in reached:
+                child = Node(state=person, parent=node, action=movie)
+                reached[person] = child
+                remaining.discard(person)
+                frontier.add(child)
+
+    return {target: solution_for(reached[target]) if target in reached else None
+            for target in targets}
+
+
+def solution_for(node):
+    """
+    Returns the (movie_id, person_id) pairs leading from the root to a node.
+    """
+    solution = []
+    while node.parent is not None:
+        solution.append((node.action, node.state))
+        node = node.parent
+    solution.reverse()
+    return solution
+
+
+def bidirectional_shortest_path(source, target, stats=None):
+    """
+    Returns the same result as shortest_path, growing one breadth-first
+    search from the source and one from the target, one layer at a time,
+    until they meet.
+    """
+
+    # Maps each person reached to the (movie_id, person_id) it was reached
+    # from, for the search from the source and the search from the target
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    explored_states = 0
+    meeting = source if source == target else None
+    tracing = isinstance(stats, SearchStats) and stats.running()
+
+    while meeting is None and forward_layer and backward_layer:
+
+        # Expand the smaller of the two layers
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting, expanded = _expand_layer(
+                forward_layer, forward, backward, stats if tracing else None)
+        else:
+            backward_layer, meeting, expanded = _expand_layer(
+                backward_layer, backward, forward, stats if tracing else None)
+        explored_states += expanded
+        if tracing:
+            stats.frontier(len(forward_layer) + len(backward_layer))
+            stats.layer()
+
+    if stats is not None:
+        stats["explored_states"] = explored_states
+    if meeting is None:
+        return None
+
+    # Path from the source to the meeting person
+    solution = []
+    person = meeting
+    while forward[person] is not None:
+        movie, previous = forward[person]
+        solution.append((movie, person))
+        person = previous
+    solution.reverse()
+
+    # Path from the meeting person to the target
+    person = meeting
+    while backward[person] is not None:
+        movie, person = backward[person]
+        solution.append((movie, person))
+
+    return solution
+
+
+def _expand_layer(layer, parents, other, stats=None):
+    """
+    Expands every person in `layer`, recording new people in `parents`.
+    Stops at the first person already reached by the other search.
+    The time spent generating neighbors is reported to a SearchStats.
+
+    Returns the next layer, the meeting person (or None) and the
+    number of people expanded.
+    """
+    next_layer = []
+    expanded = 0
+    for person in layer:
+        expanded += 1
+        if stats is not None:
+            started = time.perf_counter()
+            neighbors = neighbors_for_person(person)
+            stats.neighbors(time.perf_counter() - started)
+        else:
+            neighbors = neighbors_for_person(person)
+        for movie, neighbor in neighbors:
+            if neighbor in parents:
+                continue
+            parents[neighbor] = (movie, person)
+            if neighbor in other:
+                return next_layer, neighbor, expanded
+            next_layer.append(neighbor)
+    return next_layer, None, expanded
+
+
+def shortest_path_dag(source, target):
+    """
+    Returns a dict mapping each person reached before the target's layer
+    was finished to the list of (movie_id, person_id) pairs it can be
+    reached from on a shortest path from the source (its predecessors).
+
+    If no possible path, returns None.
+    """
+    predecessors, depth = _shortest_path_layers(source, target)
+    if target not in depth:
+        return None
+    return predecessors
+
+
+def _shortest_path_layers(source, target):
+    """
+    Breadth-first search from the source, one layer at a time, until the
+    layer holding the target is complete.
+
+    Returns the predecessors (see shortest_path_dag) and a dict mapping
+    every person reached to their degrees of separation from the source.
+    """
+    depth = {source: 0}
+    predecessors = {source: []}
+    layer = [source]
+    distance = 0
+
+    while layer and target not in depth:
+        distance += 1
+        next_layer = []
+        for person in layer:
+            for movie, neighbor in neighbors_for_person(person):
+                if neighbor not in depth:
+                    depth[neighbor] = distance
+                    predecessors[neighbor] = [(movie, person)]
+                    next_layer.append(neighbor)
+                elif depth[neighbor] == distance:
+                    predecessors[neighbor].append((movie, person))
+        layer = next_layer
+
+    return predecessors, depth
+
+
+def all_shortest_paths(source, target, predecessors=None):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, one at a time.
+
+    `predecessors` can be a dict from shortest_path_dag to reuse.
+    """
+    if predecessors is None:
+        predecessors = shortest_path_dag(source, target)
+        if predecessors is None:
+            return
+
+    # Walk the predecessors back from the target, depth first
+    stack = [(target, [])]
+    while stack:
+        person, suffix = stack.pop()
+        if person == source:
+            yield suffix
+            continue
+        for movie, previous in reversed(predecessors[person]):
+            stack.append((previous, [(movie, person)] + suffix))
+
+
+def k_shortest_paths(source, target, k):
+    """
+    Yields up to k lists of (movie_id, person_id) pairs connecting the
+    source to the target without repeating a person, shortest first
+    (Yen's algorithm).
+
+    The search from the source is run once. Its predecessor DAG yields
+    every path of the shortest length without further searching, and
+    its depth map bounds the spur searches needed after that (see
+    _spur_search), so they only explore towards the spur person.
+    """
+    predecessors, depth = _shortest_path_layers(source, target)
+    if target not in depth:
+        return
+
+    accepted = []
+    seen = set()
+    shortest = all_shortest_paths(source, target, predecessors)
+    spurred = 0
+
+    # Heap of (length, tie-breaker, path) candidates from spur searches
+    candidates = []
+    counter = itertools.count()
+
+    while len(accepted) < k:
+        path = next(shortest, None) if shortest is not None else None
+        if path is None:
+            shortest = None
+
+            # Spur from every accepted path that has not been spurred yet
+            for accepted_path in accepted[spurred:]:
+                for candidate in _spur_paths(source, target, accepted_path,
+                                             accepted, depth):
+                    key = tuple(candidate)
+                    if key not in seen:
+                        seen.add(key)
+                        heapq.heappush(candidates,
+                                       (len(candidate), next(counter), candidate))
+            spurred = len(accepted)
+
+            if not candidates:
+                return
+            path = heapq.heappop(candidates)[2]
+
+        seen.add(tuple(path))
+        accepted.append(path)
+        yield path
+
+
+def _spur_paths(source, target, path, accepted, depth):
+    """
+    Yields Yen's candidate paths that leave `path` at each of its people.
+    """
+    people_on_path = [source] + [person for _, person in path]
+    for i in range(len(path)):
+        root = path[:i]
+        spur = people_on_path[i]
+
+        # Steps out of the spur person already taken by accepted paths
+        # sharing this root, and the root's people, are off limits
+        banned_steps = {other[i] for other in accepted
+                        if len(other) > i and other[:i] == root}
+        excluded = set(people_on_path[:i])
+
+        spur_path = _spur_search(spur, target, excluded, banned_steps, depth)
+        if spur_path is not None:
+            yield root + spur_path
+
+
+def _spur_search(spur, target, excluded, banned_steps, depth):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs from the spur
+    person to the target that avoids the `excluded` people and does not
+    take any of `banned_steps` out of the spur person, or None.
+
+    The search is an A* search run backwards from the target. `depth`
+    holds the exact separation from the source of every person within
+    the target's layer, so |depth[person] - depth[spur]| is a lower bound
+    on the distance from a person to the spur. People outside `depth`
+    are further from the source than any person in it. Removing people
+    and steps only makes distances longer, so the bound stays admissible.
+    """
+    horizon = max(depth.values()) + 1
+    if spur in depth:
+        spur_depth = depth[spur]
+
+        def estimate(person):
+            return abs(depth.get(person, horizon) - spur_depth)
+    else:
+        def estimate(person):
+            return 0
+
+    # Maps each person reached to the (movie_id, person_id) step that leads
+    # from them towards the target
+    parents = {target: None}
+    distance = {target: 0}
+    counter = itertools.count()
+    frontier = [(estimate(target), next(counter), target)]
+    closed = set()
+
+    while frontier:
+        _, _, person = heapq.heappop(frontier)
+        if person in closed:
+            continue
+        closed.add(person)
+
+        if person == spur:
+            solution = []
+            while parents[person] is not None:
+                step = parents[person]
+                solution.append(step)
+                person = step[1]
+            return solution
+
+        for movie, neighbor in neighbors_for_person(person):
+            if neighbor in excluded or neighbor in closed:
+                continue
+            if neighbor == spur and (movie, person) in banned_steps:
+                continue
+            cost = distance[person] + 1
+            if cost < distance.get(neighbor, cost + 1):
+                distance[neighbor] = cost
+                parents[neighbor] = (movie, person)
+                heapq.heappush(frontier,
+                               (cost + estimate(neighbor), next(counter), neighbor))
+    return None
 
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
-    resolving ambiguities as needed.
+    resolving ambiguities as needed. A name with no exact match is
+    looked up in the name index, and the user chooses among the
+    partial or misspelled matches it finds.
     """
     person_ids = list(names.get(name.lower(), set()))
-    if len(person_ids) == 0:
-        return None
+    if len(person_ids) == 1:
+        return person_ids[0]
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
-        return None
     else:
-        return person_ids[0]
+        person_ids = person_ids_for_query(name)
+        if not person_ids:
+            return None
+        print(f"No exact match for '{name}'. Did you mean:")
+    for person_id in person_ids:
+        person = people[person_id]
+        name = person["name"]
+        birth = person["birth"]
+        print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+    try:
+        person_id = input("Intended Person ID: ")
+        if person_id in person_ids:
+            return person_id
+    except ValueError:
+        pass
+    return None
+
+
+def person_ids_for_query(query, limit=10):
+    """
+    Returns up to `limit` person_ids whose names match a partial or
+    misspelled query, best match first, without asking the user to
+    choose between people who share a name.
+    """
+    person_ids = []
+    for key in get_name_index().search(query, limit):
+        person_ids.extend(sorted(names[key]))
+        if len(person_ids) >= limit:
+            break
+    return person_ids[:limit]
 
 
 def neighbors_for_person(person_id):
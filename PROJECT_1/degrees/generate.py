@@ -0,0 +1,139 @@
+"""
+Generate a synthetic degrees dataset at any scale.
+
+Usage: python generate.py directory [credits] [--seed N]
+
+Writes people.csv, movies.csv and stars.csv to `directory` with about
+`credits` star rows. Cast sizes follow a power law (most movies have a
+few stars, some have hundreds), and stars are drawn with Zipf weights,
+so a few people appear in many movies, as in the IMDb data. The same
+seed and scale always give the same files.
+"""
+
+import csv
+import itertools
+import os
+import random
+import sys
+
+# Default number of star rows
+CREDITS = 1000000
+
+# Exponent of the cast size distribution, and its bounds
+CAST_EXPONENT = 2.0
+MIN_CAST = 1
+MAX_CAST = 250
+
+# Average number of credits per person, and the Zipf exponent of how
+# often each person is cast
+CREDITS_PER_PERSON = 4
+POPULARITY_EXPONENT = 0.5
+
+# Syllables of the generated names
+SYLLABLES = ("an", "bel", "cor", "da", "el", "fin", "gar", "ha", "is", "jo",
+             "ka", "lin", "mar", "no", "or", "pe", "qui", "ros", "sa", "ti",
+             "ul", "vic", "wen", "xa", "yu", "zo")
+
+
+def main():
+    usage = "Usage: python generate.py directory [credits] [--seed N]"
+    args = sys.argv[1:]
+    seed = 0
+    try:
+        if "--seed" in args:
+            i = args.index("--seed")
+            if i + 1 >= len(args):
+                sys.exit(usage)
+            seed = int(args[i + 1])
+            del args[i:i + 2]
+        if len(args) not in (1, 2):
+            sys.exit(usage)
+        credits = int(args[1]) if len(args) == 2 else CREDITS
+    except ValueError:
+        sys.exit(usage)
+    if credits < 1:
+        sys.exit(usage)
+    directory = args[0]
+
+    os.makedirs(directory, exist_ok=True)
+    counts = generate(directory, credits, seed)
+    print("Wrote {} people, {} movies and {} star credits to {}.".format(
+        *counts, directory))
+
+
+def generate(directory, credits, seed=0):
+    """
+    Writes the three CSV files to `directory` and returns the number
+    of people, movies and star rows written.
+    """
+    rng = random.Random(seed)
+    num_people = max(2, credits // CREDITS_PER_PERSON)
+
+    # Cumulative Zipf weights, so that rng.choices picks person i with
+    # probability proportional to 1 / (i + 1) ** POPULARITY_EXPONENT
+    weights = list(itertools.accumulate(
+        1 / (i + 1) ** POPULARITY_EXPONENT for i in range(num_people)))
+    people = range(num_people)
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8",
+              newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in people:
+            writer.writerow([i, name(rng), rng.randint(1900, 2010)])
+
+    num_movies = 0
+    rows = 0
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8",
+              newline="") as movies_file, \
+            open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8",
+                 newline="") as stars_file:
+        movies = csv.writer(movies_file)
+        stars = csv.writer(stars_file)
+        movies.writerow(["id", "title", "year"])
+        stars.writerow(["person_id", "movie_id"])
+        while rows < credits:
+            movie_id = num_movies
+            num_movies += 1
+            movies.writerow([movie_id, title(rng), rng.randint(1920, 2024)])
+
+            size = min(cast_size(rng), credits - rows, num_people)
+            cast = set()
+            while len(cast) < size:
+                cast.update(rng.choices(people, cum_weights=weights,
+                                        k=size - len(cast)))
+            for person_id in sorted(cast):
+                stars.writerow([person_id, movie_id])
+            rows += size
+
+    return num_people, num_movies, rows
+
+
+def cast_size(rng):
+    """
+    Returns a cast size drawn from a truncated power law.
+    """
+    size = int(MIN_CAST * rng.paretovariate(CAST_EXPONENT - 1))
+    return max(MIN_CAST, min(size, MAX_CAST))
+
+
+def word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+
+
+def name(rng):
+    """
+    Returns a random "First Last" name.
+    """
+    return f"{word(rng).title()} {word(rng).title()}"
+
+
+def title(rng):
+    """
+    Returns a random movie title of one to four words.
+    """
+    return " ".join(word(rng).title() for _ in range(rng.randint(1, 4)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,708 @@
+"""
+Compact, integer-indexed representation of the degrees graph.
+
+The graph can be updated in place. A changed row is copied out of the
+CSR arrays into an overflow row, and removed people and movies are left
+as empty rows, so every index stays valid and an update costs the size
+of the rows it touches. Once there are many overflow rows, compact
+merges them back into the arrays. Each change is also logged, so that
+structures built on the graph can catch up with the changes since they
+last looked instead of being rebuilt.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+from collections import deque
+import hashlib
+import itertools
+from multiprocessing import shared_memory
+
+# Typecode of the offset and index arrays (signed 32-bit integers)
+TYPECODE = "i"
+
+# Overflow rows kept before compact merges them into the arrays: at least
+# OVERFLOW_ROWS, and up to one row in OVERFLOW_FRACTION
+OVERFLOW_ROWS = 1024
+OVERFLOW_FRACTION = 4
+
+# Changes kept in the log: at least LOG_CHANGES, and up to one per row
+LOG_CHANGES = 4096
+
+
+class CompactGraph():
+    """
+    People and movies are numbered 0..n-1 in load order. The movies of
+    person p are person_movies[person_offsets[p]:person_offsets[p + 1]],
+    and the stars of movie m are
+    movie_people[movie_offsets[m]:movie_offsets[m + 1]] (CSR layout),
+    unless the row was changed and is in `person_rows` or `movie_rows`.
+
+    The IDs of removed people and movies are None. `version` counts the
+    changes made, and `changes` holds the latest of them as (added,
+    person, movie) tuples, with -1 for the movie of an added or removed
+    person and the person of an added or removed movie.
+    """
+
+    def __init__(self, person_ids, movie_ids, person_offsets, person_movies,
+                 movie_offsets, movie_people):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self._person_index = None
+        self._movie_index = None
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.person_rows = {}
+        self.movie_rows = {}
+        self.version = 0
+        self.changes = []
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Builds the graph from the `people` and `movies` dicts of degrees.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        person_offsets, person_movies = _csr(
+            [people[person_id]["movies"] for person_id in person_ids],
+            movie_index)
+        movie_offsets, movie_people = _csr(
+            [movies[movie_id]["stars"] for movie_id in movie_ids],
+            person_index)
+
+        return cls(person_ids, movie_ids, person_offsets, person_movies,
+                   movie_offsets, movie_people)
+
+    @property
+    def person_index(self):
+        """
+        Maps person IDs to indices, built on first use.
+        """
+        if self._person_index is None:
+            self._person_index = {person_id: i for i, person_id
+                                  in enumerate(self.person_ids)
+                                  if person_id is not None}
+        return self._person_index
+
+    @property
+    def movie_index(self):
+        """
+        Maps movie IDs to indices, built on first use.
+        """
+        if self._movie_index is None:
+            self._movie_index = {movie_id: i for i, movie_id
+                                 in enumerate(self.movie_ids)
+                                 if movie_id is not None}
+        return self._movie_index
+
+    def num_people(self):
+        return len(self.person_ids)
+
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    def movies_for(self, person):
+        """
+        Returns the indices of the movies a person index starred in.
+        """
+        row = self.person_rows.get(person)
+        if row is not None:
+            return row
+        return self.person_movies[self.person_offsets[person]:
+                                  self.person_offsets[person + 1]]
+
+    def stars_for(self, movie):
+        """
+        Returns the indices of the people who starred in a movie index.
+        """
+        row = self.movie_rows.get(movie)
+        if row is not None:
+            return row
+        return self.movie_people[self.movie_offsets[movie]:
+                                 self.movie_offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with a given person index.
+        """
+        for movie in self.movies_for(person):
+            for other in self.stars_for(movie):
+                yield movie, other
+
+    def signature(self):
+        """
+        Returns a digest of the people, movies and credits of the graph,
+        which differs between graphs with different data.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for ids in (self.person_ids, self.movie_ids):
+            digest.update("\0".join(map(str, ids)).encode("utf-8"))
+            digest.update(b"\1")
+
+        # The movie arrays are the transpose of the person arrays
+        if self.person_rows:
+            person_offsets, person_movies = _merged(
+                self.person_offsets, self.person_movies, self.person_rows)
+        else:
+            person_offsets = self.person_offsets
+            person_movies = self.person_movies
+        digest.update(person_offsets)
+        digest.update(person_movies)
+        return digest.digest()
+
+    def nbytes(self):
+        """
+        Returns the number of bytes held by the adjacency arrays and the
+        overflow rows.
+        """
+        rows = itertools.chain(self.person_rows.values(),
+                               self.movie_rows.values())
+        return sum(len(a) * a.itemsize for a in itertools.chain((
+            self.person_offsets, self.person_movies,
+            self.movie_offsets, self.movie_people), rows))
+
+    def add_person(self, person_id):
+        """
+        Adds a person without movies and returns their index. Raises
+        ValueError if the person_id is already in the graph.
+        """
+        person_index = self.person_index
+        if person_id in person_index:
+            raise ValueError(f"person already exists: {person_id}")
+        person = len(self.person_ids)
+        self.person_ids.append(person_id)
+        person_index[person_id] = person
+        self.person_rows[person] = array(TYPECODE)
+        self._changed(True, person, -1)
+        return person
+
+    def remove_person(self, person_id):
+        """
+        Removes a person and their credits, leaving an empty row at their
+        index. Raises LookupError if there is no such person.
+        """
+        person = self.person_index.pop(person_id, None)
+        if person is None:
+            raise LookupError(f"person not found: {person_id}")
+        for movie in self.movies_for(person):
+            _discard(self._movie_row(movie), person)
+            self._changed(False, person, movie)
+        self.person_rows[person] = array(TYPECODE)
+        self.person_ids[person] = None
+        self._changed(False, person, -1)
+
+    def add_movie(self, movie_id):
+        """
+        Adds a movie without stars and returns its index. Raises
+        ValueError if the movie_id is already in the graph.
+        """
+        movie_index = self.movie_index
+        if movie_id in movie_index:
+            raise ValueError(f"movie already exists: {movie_id}")
+        movie = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        movie_index[movie_id] = movie
+        self.movie_rows[movie] = array(TYPECODE)
+        self._changed(True, -1, movie)
+        return movie
+
+    def remove_movie(self, movie_id):
+        """
+        Removes a movie and its credits, leaving an empty row at its
+        index. Raises LookupError if there is no such movie.
+        """
+        movie = self.movie_index.pop(movie_id, None)
+        if movie is None:
+            raise LookupError(f"movie not found: {movie_id}")
+        for person in self.stars_for(movie):
+            _discard(self._person_row(person), movie)
+            self._changed(False, person, movie)
+        self.movie_rows[movie] = array(TYPECODE)
+        self.movie_ids[movie] = None
+        self._changed(False, -1, movie)
+
+    def add_star(self, person_id, movie_id):
+        """
+        Records that a person starred in a movie, if not already recorded.
+        Raises LookupError if either is not in the graph.
+        """
+        person, movie = self._credit(person_id, movie_id)
+        row = self._person_row(person)
+        i = bisect_left(row, movie)
+        if i < len(row) and row[i] == movie:
+            return
+        row.insert(i, movie)
+        insort(self._movie_row(movie), person)
+        self._changed(True, person, movie)
+
+    def remove_star(self, person_id, movie_id):
+        """
+        Removes a star credit, if recorded. Raises LookupError if either
+        the person or the movie is not in the graph.
+        """
+        person, movie = self._credit(person_id, movie_id)
+        if movie not in self.movies_for(person):
+            return
+        _discard(self._person_row(person), movie)
+        _discard(self._movie_row(movie), person)
+        self._changed(False, person, movie)
+
+    def changes_since(self, version):
+        """
+        Returns the changes made since the graph was at `version`, or
+        None if some of them are no longer in the log.
+        """
+        start = self.version - len(self.changes)
+        if version < start:
+            return None
+        return self.changes[version - start:]
+
+    def compact(self):
+        """
+        Merges the overflow rows into the CSR arrays. Every index is kept,
+        with the rows of removed people and movies left empty.
+        """
+        if self.person_rows:
+            self.person_offsets, self.person_movies = _merged(
+                self.person_offsets, self.person_movies, self.person_rows)
+            self.person_rows = {}
+        if self.movie_rows:
+            self.movie_offsets, self.movie_people = _merged(
+                self.movie_offsets, self.movie_people, self.movie_rows)
+            self.movie_rows = {}
+
+    def _credit(self, person_id, movie_id):
+        """
+        Returns the person and movie indices of a star credit.
+        """
+        person = self.person_index.get(person_id)
+        if person is None:
+            raise LookupError(f"person not found: {person_id}")
+        movie = self.movie_index.get(movie_id)
+        if movie is None:
+            raise LookupError(f"movie not found: {movie_id}")
+        return person, movie
+
+    def _person_row(self, person):
+        """
+        Returns the overflow row of a person index, copying it out of the
+        arrays on its first change.
+        """
+        row = self.person_rows.get(person)
+        if row is None:
+            row = self.person_rows[person] = array(TYPECODE,
+                                                   self.movies_for(person))
+        return row
+
+    def _movie_row(self, movie):
+        """
+        Returns the overflow row of a movie index, copying it out of the
+        arrays on its first change.
+        """
+        row = self.movie_rows.get(movie)
+        if row is None:
+            row = self.movie_rows[movie] = array(TYPECODE,
+                                                 self.stars_for(movie))
+        return row
+
+    def _changed(self, added, person, movie):
+        """
+        Logs a change, dropping the older half of the log once it is
+        long, and compacts the graph once it has many overflow rows.
+        """
+        self.changes.append((added, person, movie))
+        self.version += 1
+        rows = len(self.person_ids) + len(self.movie_ids)
+        if len(self.changes) > max(LOG_CHANGES, rows):
+            del self.changes[:len(self.changes) // 2]
+        if len(self.person_rows) + len(self.movie_rows) > max(
+                OVERFLOW_ROWS, rows // OVERFLOW_FRACTION):
+            self.compact()
+
+    def shortest_path(self, source, target, bidirectional=False, stats=None):
+        """
+        Same contract as degrees.shortest_path, with person IDs in and
+        (movie_id, person_id) pairs out, searching the integer graph.
+        """
+        if source not in self.person_index or target not in self.person_index:
+            return None
+        source = self.person_index[source]
+        target = self.person_index[target]
+        if bidirectional:
+            path, explored_states = self._bidirectional_search(source, target)
+        else:
+            path, explored_states = self._search(source, target)
+        if stats is not None:
+            stats["explored_states"] = explored_states
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+    def paths_from(self, source, targets):
+        """
+        Returns a dict mapping each target person ID to its shortest list
+        of (movie_id, person_id) pairs from `source`, or None, answering
+        every target from a single breadth-first search.
+        """
+        person_index = self.person_index
+        if source not in person_index:
+            return {target: None for target in targets}
+        index_paths = self.index_paths_from(
+            person_index[source],
+            {person_index[target] for target in targets if target in person_index})
+
+        paths = {}
+        for target in targets:
+            path = index_paths.get(person_index.get(target))
+            if path is None:
+                paths[target] = None
+            else:
+                paths[target] = [(self.movie_ids[movie], self.person_ids[person])
+                                 for movie, person in path]
+        return paths
+
+    def index_paths_from(self, source, targets):
+        """
+        Same as paths_from, with person indices in and
+        (movie, person) index pairs out.
+        """
+        parent_person, parent_movie, _ = self._search_tree(source, targets)
+        return {target: _walk(parent_person, parent_movie, source, target)
+                if parent_person[target] != -1 else None
+                for target in targets}
+
+    def _search(self, source, target):
+        """
+        Breadth-first search over person indices.
+
+        Returns a list of (movie, person) index pairs, or None,
+        and the number of people expanded.
+        """
+        if source == target:
+            return [], 1
+        parent_person, parent_movie, explored_states = self._search_tree(
+            source, {target})
+        if parent_person[target] == -1:
+            return None, explored_states
+        return _walk(parent_person, parent_movie, source, target), explored_states
+
+    def _search_tree(self, source, targets):
+        """
+        Breadth-first search from a person index until every index in
+        `targets` has been reached or the component is exhausted.
+
+        Returns the parent person and parent movie arrays (-1 where a
+        person was not reached) and the number of people expanded.
+        """
+        tree = SearchTree(self, source)
+        tree.grow(targets)
+        return tree.parent_person, tree.parent_movie, tree.explored_states
+
+    def _bidirectional_search(self, source, target):
+        """
+        Breadth-first search from both ends, expanding the smaller layer.
+
+        Returns a list of (movie, person) index pairs, or None,
+        and the number of people expanded.
+        """
+        if source == target:
+            return [], 0
+
+        forward = {source: None}
+        backward = {target: None}
+        forward_layer = [source]
+        backward_layer = [target]
+
+        explored_states = 0
+        meeting = None
+        while meeting is None and forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meeting, expanded = self._expand_layer(
+                    forward_layer, forward, backward)
+            else:
+                backward_layer, meeting, expanded = self._expand_layer(
+                    backward_layer, backward, forward)
+            explored_states += expanded
+
+        if meeting is None:
+            return None, explored_states
+
+        path = []
+        person = meeting
+        while forward[person] is not None:
+            movie, previous = forward[person]
+            path.append((movie, person))
+            person = previous
+        path.reverse()
+        person = meeting
+        while backward[person] is not None:
+            movie, person = backward[person]
+            path.append((movie, person))
+        return path, explored_states
+
+    def _expand_layer(self, layer, parents, other):
+        """
+        Expands a layer of person indices, stopping at the first
+        person already reached from the other end.
+
+        Returns the next layer, the meeting person (or None) and the
+        number of people expanded.
+        """
+        next_layer = []
+        expanded = 0
+        for person in layer:
+            expanded += 1
+            for movie, neighbor in self.neighbors(person):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (movie, person)
+                if neighbor in other:
+                    return next_layer, neighbor, expanded
+                next_layer.append(neighbor)
+        return next_layer, None, expanded
+
+
+class SearchTree():
+    """
+    A breadth-first search from one person index that can be stopped once
+    some targets are reached and resumed later for others. Between calls
+    to grow, the tree keeps its parent arrays, the movies already scanned
+    and the frontier of people still to expand.
+    """
+
+    def __init__(self, graph, source):
+        self.graph = graph
+        self.source = source
+        self.parent_person = array(TYPECODE, [-1]) * graph.num_people()
+        self.parent_movie = array(TYPECODE, [-1]) * graph.num_people()
+        self.parent_person[source] = source
+
+        # Every star of a movie is queued the first time the movie is seen,
+        # so each movie needs to be scanned only once per search
+        self.movie_seen = bytearray(graph.num_movies())
+        self.frontier = deque([source])
+        self.explored_states = 0
+
+        # Whether the first person of the frontier was already counted,
+        # having been put back part way through its expansion
+        self.resuming = False
+
+    def complete(self):
+        """
+        Returns True once the whole component of the source is reached.
+        """
+        return not self.frontier
+
+    def reached(self, person):
+        return self.parent_person[person] != -1
+
+    def affected_by(self, people, movies):
+        """
+        Returns True if changes to the rows of the given person and movie
+        indices can alter the tree: if it reached one of the people or
+        scanned one of the movies.
+        """
+        parent_person = self.parent_person
+        reached = len(parent_person)
+        if any(parent_person[person] != -1
+               for person in people if person < reached):
+            return True
+        movie_seen = self.movie_seen
+        scanned = len(movie_seen)
+        return any(movie_seen[movie] for movie in movies if movie < scanned)
+
+    def resize(self):
+        """
+        Extends the tree to the people and movies added to the graph.
+        """
+        graph = self.graph
+        added = graph.num_people() - len(self.parent_person)
+        if added > 0:
+            self.parent_person.extend(array(TYPECODE, [-1]) * added)
+            self.parent_movie.extend(array(TYPECODE, [-1]) * added)
+        added = graph.num_movies() - len(self.movie_seen)
+        if added > 0:
+            self.movie_seen.extend(bytes(added))
+
+    def grow(self, targets):
+        """
+        Continues the search until every person index in `targets` has
+        been reached or the component is exhausted.
+        """
+        parent_person = self.parent_person
+        parent_movie = self.parent_movie
+        remaining = {target for target in targets if parent_person[target] == -1}
+        if not remaining:
+            return
+
+        graph = self.graph
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_people = graph.movie_people
+        person_rows = graph.person_rows
+        movie_rows = graph.movie_rows
+        movie_seen = self.movie_seen
+        frontier = self.frontier
+
+        while frontier:
+            person = frontier.popleft()
+            if self.resuming:
+                self.resuming = False
+            else:
+                self.explored_states += 1
+            if person_rows and person in person_rows:
+                movies = person_rows[person]
+            else:
+                movies = person_movies[person_offsets[person]:
+                                       person_offsets[person + 1]]
+            for movie in movies:
+                if movie_seen[movie]:
+                    continue
+                movie_seen[movie] = 1
+                if movie_rows and movie in movie_rows:
+                    stars = movie_rows[movie]
+                else:
+                    stars = movie_people[movie_offsets[movie]:
+                                         movie_offsets[movie + 1]]
+                for other in stars:
+                    if parent_person[other] != -1:
+                        continue
+                    parent_person[other] = person
+                    parent_movie[other] = movie
+                    frontier.append(other)
+                    remaining.discard(other)
+                if not remaining:
+                    break
+            if not remaining:
+                # Put the person back so a later call scans the movies
+                # it did not reach yet
+                frontier.appendleft(person)
+                self.resuming = True
+                return
+
+    def path_to(self, target):
+        """
+        Returns the (movie, person) index pairs leading to a reached
+        target, or None if the search has not reached it.
+        """
+        if self.parent_person[target] == -1:
+            return None
+        return _walk(self.parent_person, self.parent_movie, self.source, target)
+
+    def nbytes(self):
+        """
+        Returns the approximate number of bytes held by the tree.
+        """
+        return (len(self.parent_person) * self.parent_person.itemsize * 2
+                + len(self.movie_seen) + 8 * len(self.frontier))
+
+
+def share(graph):
+    """
+    Copies the adjacency arrays of `graph` into a new shared memory block,
+    compacting it first so that its overflow rows are shared too.
+
+    Returns the SharedMemory, which the caller must close and unlink,
+    and the layout that `attach` needs to map it in another process.
+    """
+    graph.compact()
+    arrays = (graph.person_offsets, graph.person_movies,
+              graph.movie_offsets, graph.movie_people)
+    size = sum(len(a) * a.itemsize for a in arrays)
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+
+    layout = []
+    offset = 0
+    for a in arrays:
+        nbytes = len(a) * a.itemsize
+        block.buf[offset:offset + nbytes] = a.tobytes()
+        layout.append((offset, len(a)))
+        offset += nbytes
+    return block, (block.name, tuple(layout))
+
+
+def attach(layout):
+    """
+    Returns (block, graph) for a layout from `share`. The graph's arrays
+    are views of the shared block, and its IDs are the indices themselves.
+    The block must stay referenced while the graph is in use.
+    """
+    name, sections = layout
+    block = shared_memory.SharedMemory(name=name)
+
+    itemsize = array(TYPECODE).itemsize
+    arrays = [block.buf[offset:offset + length * itemsize].cast(TYPECODE)
+              for offset, length in sections]
+    num_people = sections[0][1] - 1
+    num_movies = sections[2][1] - 1
+    return block, CompactGraph(range(num_people), range(num_movies), *arrays)
+
+
+def _csr(adjacency, index):
+    """
+    Returns the offset and index arrays for a list of sets of IDs,
+    with each row sorted so the layout does not depend on set order.
+    """
+    offsets = array(TYPECODE, [0])
+    indices = array(TYPECODE)
+    for ids in adjacency:
+        indices.extend(sorted(index[i] for i in ids))
+        offsets.append(len(indices))
+    return offsets, indices
+
+
+def _merged(offsets, indices, rows):
+    """
+    Returns the offset and index arrays of CSR arrays with the overflow
+    `rows` in place of theirs, copying each run of unchanged rows at once.
+    """
+    merged_offsets = array(TYPECODE, [0])
+    merged = array(TYPECODE)
+    count = len(offsets) - 1
+    start = 0
+    for row in sorted(rows):
+        end = min(row, count)
+        if start < end:
+            shift = len(merged) - offsets[start]
+            merged.extend(indices[offsets[start]:offsets[end]])
+            merged_offsets.extend([offset + shift
+                                   for offset in offsets[start + 1:end + 1]])
+        merged.extend(rows[row])
+        merged_offsets.append(len(merged))
+        start = row + 1
+    if start < count:
+        shift = len(merged) - offsets[start]
+        merged.extend(indices[offsets[start]:offsets[count]])
+        merged_offsets.extend([offset + shift
+                               for offset in offsets[start + 1:count + 1]])
+    return merged_offsets, merged
+
+
+def _discard(row, index):
+    """
+    Removes an index from a sorted row, if it is there.
+    """
+    i = bisect_left(row, index)
+    if i < len(row) and row[i] == index:
+        del row[i]
+
+
+def _walk(parent_person, parent_movie, source, target):
+    """
+    Follows the parent arrays from the target back to the source.
+    """
+    path = []
+    person = target
+    while person != source:
+        path.append((parent_movie[person], person))
+        person = parent_person[person]
+    path.reverse()
+    return path
@@ -0,0 +1,363 @@
+"""
+Landmark distance index for the degrees graph.
+
+A breadth-first search from each of a few landmark people records their
+separation from every person. By the triangle inequality, for any two
+people a and b and any landmark L:
+
+    |d(L, a) - d(L, b)| <= d(a, b) <= d(L, a) + d(L, b)
+
+which gives lower and upper bounds on separation without a search, and
+an admissible estimate that guides an A* search for exact paths.
+
+The index follows updates made to its graph in place. An added credit
+can only shorten separations, so the distances are lowered from the
+movies that gained stars. A removed credit can only lengthen them, so
+the old distances remain lower bounds, and the upper bounds are not
+used until the distances are recomputed.
+"""
+
+import heapq
+import itertools
+import math
+import os
+import struct
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+MAGIC = b"LANDMARK"
+VERSION = 2
+
+# Magic, version, number of people, number of landmarks, graph signature
+HEADER = struct.Struct("<8sIqI16s")
+
+# Number of landmarks chosen by default
+LANDMARKS = 16
+
+
+class LandmarkIndex():
+    """
+    `landmarks` holds the person indices of the landmarks, and
+    `distances[i][p]` the separation of landmark i from person index p,
+    or UNREACHABLE. `graph` is the CompactGraph the index belongs to;
+    searches on any other graph (such as one rebuilt from the data) are
+    refused, since the bounds would no longer hold. `exact` is False
+    once removals have left the distances as lower bounds only.
+    """
+
+    def __init__(self, landmarks, distances, graph=None):
+        self.landmarks = landmarks
+        self.distances = distances
+        self.graph = graph
+        self.version = None if graph is None else graph.version
+        self.exact = True
+
+    @classmethod
+    def build(cls, graph, count=LANDMARKS, landmarks=None):
+        """
+        Builds the index for a CompactGraph. Without explicit landmark
+        indices, the first landmark is the person with the most movies
+        and each next one is the person furthest from those already
+        chosen, so the landmarks spread over the graph.
+        """
+        if landmarks is not None:
+            landmarks = list(landmarks)
+            return cls(landmarks, [_distances(graph, l) for l in landmarks],
+                       graph)
+
+        credits = [len(graph.movies_for(p)) for p in range(graph.num_people())]
+        chosen = []
+        distances = []
+        closest = [UNREACHABLE] * graph.num_people()
+        candidate = max(range(graph.num_people()), key=credits.__getitem__,
+                        default=None)
+        while candidate is not None and len(chosen) < count:
+            chosen.append(candidate)
+            distances.append(_distances(graph, candidate))
+            closest = [min(a, b) for a, b in zip(closest, distances[-1])]
+
+            # Prefer people no landmark reaches, then the furthest away
+            candidate = None
+            best = (0, 0)
+            for person, distance in enumerate(closest):
+                if distance == 0 or not credits[person]:
+                    continue
+                key = (distance, credits[person])
+                if key > best:
+                    best = key
+                    candidate = person
+        return cls(chosen, distances, graph)
+
+    def nbytes(self):
+        """
+        Returns the number of bytes of distance data held by the index.
+        """
+        return sum(len(d) for d in self.distances)
+
+    def bounds(self, a, b):
+        """
+        Returns (lower, upper) bounds on the separation of person indices
+        a and b. Both are math.inf when a landmark shows the two people
+        are not connected, and upper is math.inf when no landmark
+        reaches both or the distances are not exact.
+        """
+        self.update()
+        if a == b:
+            return 0, 0
+        lower = 1
+        upper = math.inf
+        for distances in self.distances:
+            da = distances[a]
+            db = distances[b]
+            if da == UNREACHABLE or db == UNREACHABLE:
+                if da != db:
+                    return math.inf, math.inf
+                continue
+            lower = max(lower, abs(da - db))
+            upper = min(upper, da + db)
+        if not self.exact:
+            upper = math.inf
+        return lower, upper
+
+    def bounds_for(self, graph, a, b):
+        """
+        Same as bounds, for person IDs of `graph`.
+        """
+        return self.bounds(graph.person_index[a], graph.person_index[b])
+
+    def estimate(self, target):
+        """
+        Returns a function giving a lower bound on the separation of a
+        person index from `target`, or math.inf if they are not connected.
+        """
+        self.update()
+        columns = [(distances, distances[target]) for distances in self.distances]
+
+        def estimate(person):
+            lower = 0
+            for distances, dt in columns:
+                dp = distances[person]
+                if dp == UNREACHABLE or dt == UNREACHABLE:
+                    if dp != dt:
+                        return math.inf
+                    continue
+                if abs(dp - dt) > lower:
+                    lower = abs(dp - dt)
+            return lower
+        return estimate
+
+    def shortest_path(self, graph, source, target, stats=None):
+        """
+        Same contract as degrees.shortest_path on a CompactGraph, using an
+        A* search ordered by the landmark lower bound and pruned by the
+        landmark upper bound. Raises ValueError for a graph the index
+        was not built or loaded for.
+        """
+        if self.graph is not None and graph is not self.graph:
+            raise ValueError("landmark index belongs to another graph")
+        person_index = graph.person_index
+        if source not in person_index or target not in person_index:
+            return None
+        path, explored_states = self._search(
+            graph, person_index[source], person_index[target])
+        if stats is not None:
+            stats["explored_states"] = explored_states
+        if path is None:
+            return None
+        return [(graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in path]
+
+    def update(self):
+        """
+        Brings the distances up to date with the changes made to the
+        graph since the index last looked, recomputing them if the graph
+        no longer has those changes in its log.
+        """
+        graph = self.graph
+        if graph is None or graph.version == self.version:
+            return
+        changes = graph.changes_since(self.version)
+        self.version = graph.version
+        if changes is None:
+            self.distances = [_distances(graph, l) for l in self.landmarks]
+            self.exact = True
+            return
+
+        # New people start unreached, and movies with new stars lower them
+        for distances in self.distances:
+            new_people = graph.num_people() - len(distances)
+            distances.extend(bytes([UNREACHABLE]) * new_people)
+        movies = set()
+        for added, person, movie in changes:
+            if person == -1 or movie == -1:
+                continue
+            if added:
+                movies.add(movie)
+            else:
+                self.exact = False
+        for distances in self.distances:
+            _lower(graph, distances, movies)
+
+    def _search(self, graph, source, target):
+        """
+        A* search over person indices. Returns a list of (movie, person)
+        index pairs, or None, and the number of people expanded.
+        """
+        lower, upper = self.bounds(source, target)
+        if lower == math.inf:
+            return None, 0
+        estimate = self.estimate(target)
+
+        # Maps each person reached to (movie, person) it was reached from
+        parents = {source: None}
+        cost = {source: 0}
+        counter = itertools.count()
+
+        # Ties on the estimate go to the deepest person, who is closest to
+        # the target; separations are short, so ties are the common case
+        frontier = [(lower, 0, next(counter), source)]
+        closed = set()
+        explored_states = 0
+
+        while frontier:
+            _, _, _, person = heapq.heappop(frontier)
+            if person in closed:
+                continue
+            closed.add(person)
+            explored_states += 1
+
+            if person == target:
+                path = []
+                while parents[person] is not None:
+                    movie, previous = parents[person]
+                    path.append((movie, person))
+                    person = previous
+                path.reverse()
+                return path, explored_states
+
+            distance = cost[person] + 1
+            for movie in graph.movies_for(person):
+                for other in graph.stars_for(movie):
+                    if other in closed or distance >= cost.get(other, math.inf):
+                        continue
+                    priority = distance + estimate(other)
+
+                    # No path through this person can beat the upper bound
+                    if priority > upper:
+                        continue
+                    cost[other] = distance
+                    parents[other] = (movie, person)
+                    heapq.heappush(frontier,
+                                   (priority, -distance, next(counter), other))
+
+        return None, explored_states
+
+    def save(self, filename):
+        """
+        Writes the index to a binary file, with the signature of its
+        graph, first recomputing distances that are not exact. Raises
+        ValueError for an index without a graph.
+        """
+        if self.graph is None:
+            raise ValueError("landmark index has no graph to sign")
+        self.update()
+        if not self.exact:
+            self.distances = [_distances(self.graph, l)
+                              for l in self.landmarks]
+            self.exact = True
+        num_people = len(self.distances[0]) if self.distances else 0
+        temporary = filename + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, num_people, len(self.landmarks),
+                                self.graph.signature()))
+            f.write(struct.pack(f"<{len(self.landmarks)}q", *self.landmarks))
+            for distances in self.distances:
+                f.write(distances)
+        os.replace(temporary, filename)
+
+    @classmethod
+    def load(cls, filename, graph):
+        """
+        Reads an index written by save, or returns None if the file is
+        missing or was built for a graph with other data than `graph`.
+        """
+        try:
+            with open(filename, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < HEADER.size:
+            return None
+        magic, version, num_people, count, signature = HEADER.unpack_from(data)
+        if (magic != MAGIC or version != VERSION
+                or num_people != graph.num_people()
+                or signature != graph.signature()
+                or len(data) != HEADER.size + 8 * count + count * num_people):
+            return None
+        landmarks = list(struct.unpack_from(f"<{count}q", data, HEADER.size))
+        offset = HEADER.size + 8 * count
+        distances = [bytearray(data[offset + i * num_people:
+                                    offset + (i + 1) * num_people])
+                     for i in range(count)]
+        return cls(landmarks, distances, graph)
+
+
+def _distances(graph, source):
+    """
+    Returns a bytearray of the separation of every person index from
+    `source`, with UNREACHABLE for people in other components.
+    """
+    distances = bytearray([UNREACHABLE]) * graph.num_people()
+    distances[source] = 0
+    movie_seen = bytearray(graph.num_movies())
+    layer = [source]
+    depth = 0
+    while layer:
+        depth += 1
+        if depth >= UNREACHABLE:
+            raise ValueError("separation too large for the landmark index")
+        next_layer = []
+        for person in layer:
+            for movie in graph.movies_for(person):
+                if movie_seen[movie]:
+                    continue
+                movie_seen[movie] = 1
+                for other in graph.stars_for(movie):
+                    if distances[other] == UNREACHABLE:
+                        distances[other] = depth
+                        next_layer.append(other)
+        layer = next_layer
+    return distances
+
+
+def _lower(graph, distances, movies):
+    """
+    Lowers the separations in `distances` after stars were added to
+    `movies`: every star of such a movie is at most one step from the
+    closest of them, and the lowered people may in turn lower others.
+    """
+    frontier = []
+    for movie in movies:
+        stars = graph.stars_for(movie)
+        closest = min((distances[person] for person in stars),
+                      default=UNREACHABLE)
+        if closest == UNREACHABLE:
+            continue
+        for person in stars:
+            if distances[person] > closest + 1:
+                distances[person] = closest + 1
+                frontier.append((closest + 1, person))
+    heapq.heapify(frontier)
+
+    while frontier:
+        distance, person = heapq.heappop(frontier)
+        if distance != distances[person]:
+            continue
+        if distance + 1 >= UNREACHABLE:
+            raise ValueError("separation too large for the landmark index")
+        for movie in graph.movies_for(person):
+            for other in graph.stars_for(movie):
+                if distances[other] > distance + 1:
+                    distances[other] = distance + 1
+                    heapq.heappush(frontier, (distance + 1, other))
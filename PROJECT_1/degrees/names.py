@@ -0,0 +1,201 @@
+"""
+Prefix and fuzzy search over the names of the degrees dataset.
+
+The lowercased names are kept in a sorted list, so every name with a
+given prefix is found by binary search, and each name is indexed by its
+character trigrams, so misspelled names are found by counting the
+trigrams they share with the query and ranking the best candidates by
+edit distance. Names can be added and removed after the index is built.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+# Typecode of the trigram posting lists (signed 32-bit key indices)
+TYPECODE = "i"
+
+# Number of results returned by default
+LIMIT = 10
+
+# Most prefix matches collected before ranking
+PREFIX_SCAN = 1000
+
+# Number of names whose shared trigrams are counted exactly, and of
+# those ranked by edit distance
+FUZZY_CANDIDATES = 200
+FUZZY_RANKED = 20
+
+# Least fraction of the query's trigrams a fuzzy candidate must share
+MIN_SHARED = 0.5
+
+
+class NameIndex():
+    """
+    `keys` is the list of distinct lowercased names, numbered in the
+    order they were added (None once removed), `sorted_keys` the same
+    names in sorted order, and `trigrams` maps each trigram to the array
+    of key indices containing it.
+    """
+
+    def __init__(self, keys, trigrams):
+        self.keys = keys
+        self.sorted_keys = sorted(key for key in keys if key is not None)
+        self.key_index = {key: i for i, key in enumerate(keys)
+                          if key is not None}
+        self.trigrams = trigrams
+
+    @classmethod
+    def build(cls, names):
+        """
+        Builds the index for the keys of a `names` dict of degrees,
+        which are already lowercased.
+        """
+        keys = sorted(names)
+        postings = {}
+        for i, key in enumerate(keys):
+            for trigram in trigrams_for(key):
+                if trigram in postings:
+                    postings[trigram].append(i)
+                else:
+                    postings[trigram] = [i]
+        trigrams = {trigram: array(TYPECODE, indices)
+                    for trigram, indices in postings.items()}
+        return cls(keys, trigrams)
+
+    def nbytes(self):
+        """
+        Returns the number of bytes held by the trigram posting arrays.
+        """
+        return sum(len(a) * a.itemsize for a in self.trigrams.values())
+
+    def add(self, key):
+        """
+        Adds a lowercased name, if it is not indexed yet.
+        """
+        if key in self.key_index:
+            return
+        i = len(self.keys)
+        self.keys.append(key)
+        self.key_index[key] = i
+        insort(self.sorted_keys, key)
+        for trigram in trigrams_for(key):
+            if trigram in self.trigrams:
+                self.trigrams[trigram].append(i)
+            else:
+                self.trigrams[trigram] = array(TYPECODE, [i])
+
+    def remove(self, key):
+        """
+        Removes a lowercased name. Its trigram postings are left in
+        place and skipped by searches.
+        """
+        i = self.key_index.pop(key, None)
+        if i is None:
+            return
+        self.keys[i] = None
+        del self.sorted_keys[bisect_left(self.sorted_keys, key)]
+
+    def search(self, query, limit=LIMIT):
+        """
+        Returns up to `limit` lowercased names matching `query`, best
+        first: the exact name, then names starting with the query
+        (shortest first), then, unless the name was exact, names ranked
+        by edit distance.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        results = []
+        seen = set()
+        for key in self.prefix(query, PREFIX_SCAN):
+            if key not in seen:
+                seen.add(key)
+                results.append(key)
+        results.sort(key=lambda key: (key != query, len(key), key))
+        del results[limit:]
+        if len(results) < limit and query not in seen:
+            for key in self.fuzzy(query, limit):
+                if key not in seen:
+                    seen.add(key)
+                    results.append(key)
+                    if len(results) == limit:
+                        break
+        return results
+
+    def prefix(self, query, limit=PREFIX_SCAN):
+        """
+        Returns up to `limit` names starting with a lowercased query,
+        in sorted order.
+        """
+        keys = self.sorted_keys
+        results = []
+        i = bisect_left(keys, query)
+        while i < len(keys) and len(results) < limit \
+                and keys[i].startswith(query):
+            results.append(keys[i])
+            i += 1
+        return results
+
+    def fuzzy(self, query, limit=LIMIT):
+        """
+        Returns up to `limit` names closest to a lowercased query by edit
+        distance, among those sharing the most trigrams with it.
+        """
+        query_trigrams = trigrams_for(query)
+        least = max(1, int(len(query_trigrams) * MIN_SHARED))
+
+        # A name sharing `least` trigrams with the query contains at least
+        # one of its len - least + 1 rarest trigrams, so only those
+        # posting lists are counted; common trigrams would dominate the cost
+        postings = sorted((self.trigrams.get(trigram, ()) for trigram in query_trigrams),
+                          key=len)
+        shared = Counter()
+        for posting in postings[:len(postings) - least + 1]:
+            shared.update(posting)
+
+        candidates = []
+        for i, _ in shared.most_common(FUZZY_CANDIDATES):
+            key = self.keys[i]
+            if key is None:
+                continue
+            count = len(query_trigrams & trigrams_for(key))
+            if count >= least:
+                candidates.append((key, count))
+        candidates.sort(key=lambda candidate: -candidate[1])
+        del candidates[FUZZY_RANKED:]
+        ranked = sorted(candidates, key=lambda candidate: (
+            edit_distance(query, candidate[0]), -candidate[1], candidate[0]))
+        return [key for key, _ in ranked[:limit]]
+
+
+def normalize(name):
+    """
+    Returns a query in the form of the keys of degrees.names.
+    """
+    return name.strip().lower()
+
+
+def trigrams_for(key):
+    """
+    Returns the set of trigrams of a lowercased name, padded so that
+    the start and end of the name form trigrams too.
+    """
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b):
+    """
+    Returns the Levenshtein distance between two strings.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
@@ -0,0 +1,169 @@
+"""
+Binary snapshot of a loaded degrees dataset.
+
+The snapshot holds the CompactGraph adjacency arrays, which are read back
+through mmap without copying, and a string table with the IDs, names,
+births, titles and years. Each string column is stored as one UTF-8 blob
+with the character offset of every string, so any text can be stored.
+It records the modification time and size of the CSV files it was built
+from and is ignored once any of them change.
+"""
+
+from array import array
+import mmap
+import os
+import struct
+import sys
+
+from graph import CompactGraph, TYPECODE
+
+SNAPSHOT_NAME = "degrees.snapshot"
+CSV_FILES = ("people.csv", "movies.csv", "stars.csv")
+
+MAGIC = b"DEGREES\x00"
+VERSION = 2
+
+# Magic, version, then (mtime_ns, size) of each CSV file,
+# the lengths of the four arrays and the byte lengths of the six string columns
+HEADER = struct.Struct("<8sI4x6q4q6q")
+
+# Typecode of the character offsets of a string column (signed 64-bit)
+OFFSET_TYPECODE = "q"
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def source_signature(directory):
+    """
+    Returns the (mtime_ns, size) of every CSV file, flattened.
+    """
+    signature = []
+    for filename in CSV_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        signature.extend((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def write(directory, graph, people, movies):
+    """
+    Writes a snapshot of `graph` and the `people` and `movies` dicts
+    next to the CSV files in `directory`.
+    """
+    columns = [
+        graph.person_ids,
+        [people[person_id]["name"] for person_id in graph.person_ids],
+        [people[person_id]["birth"] for person_id in graph.person_ids],
+        graph.movie_ids,
+        [movies[movie_id]["title"] for movie_id in graph.movie_ids],
+        [movies[movie_id]["year"] for movie_id in graph.movie_ids],
+    ]
+    offsets = [_string_offsets(column) for column in columns]
+    blobs = ["".join(column).encode("utf-8") for column in columns]
+    arrays = (graph.person_offsets, graph.person_movies,
+              graph.movie_offsets, graph.movie_people)
+
+    header = HEADER.pack(
+        MAGIC, VERSION, *source_signature(directory),
+        *(len(a) for a in arrays), *(len(blob) for blob in blobs))
+
+    # Write to a temporary file first so a crash never leaves a partial snapshot
+    path = snapshot_path(directory)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(header)
+        for a in arrays:
+            f.write(a.tobytes())
+            f.write(_padding(len(a) * a.itemsize))
+        for column_offsets, blob in zip(offsets, blobs):
+            f.write(column_offsets.tobytes())
+            f.write(blob)
+            f.write(_padding(len(blob)))
+    os.replace(temporary, path)
+
+
+def load(directory):
+    """
+    Returns (graph, columns) from the snapshot in `directory`, where
+    columns maps "names", "births", "titles" and "years" to lists in
+    index order. Returns None if there is no valid, up-to-date snapshot.
+    """
+    if sys.byteorder != "little":
+        return None
+    try:
+        with open(snapshot_path(directory), "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        signature = source_signature(directory)
+    except (OSError, ValueError):
+        return None
+
+    view = memoryview(buffer)
+    if len(view) < HEADER.size:
+        return None
+    fields = HEADER.unpack(view[:HEADER.size])
+    if fields[0] != MAGIC or fields[1] != VERSION or fields[2:8] != signature:
+        return None
+    array_lengths = fields[8:12]
+    blob_lengths = fields[12:18]
+
+    itemsize = struct.calcsize(TYPECODE)
+    offset = HEADER.size
+    arrays = []
+    for length in array_lengths:
+        nbytes = length * itemsize
+        if offset + nbytes > len(view):
+            return None
+        arrays.append(view[offset:offset + nbytes].cast(TYPECODE))
+        offset += nbytes + len(_padding(nbytes))
+
+    # Three columns per person, then three per movie
+    num_people = array_lengths[0] - 1
+    num_movies = array_lengths[2] - 1
+    if num_people < 0 or num_movies < 0:
+        return None
+    counts = (num_people,) * 3 + (num_movies,) * 3
+
+    offset_size = struct.calcsize(OFFSET_TYPECODE)
+    columns = []
+    for length, count in zip(blob_lengths, counts):
+        nbytes = (count + 1) * offset_size
+        if offset + nbytes + length > len(view):
+            return None
+        starts = view[offset:offset + nbytes].cast(OFFSET_TYPECODE)
+        offset += nbytes
+        try:
+            text = str(view[offset:offset + length], "utf-8")
+        except UnicodeDecodeError:
+            return None
+        offset += length + len(_padding(length))
+        if starts[0] != 0 or starts[count] != len(text):
+            return None
+        columns.append([text[starts[i]:starts[i + 1]] for i in range(count)])
+    if offset != len(view):
+        return None
+
+    person_ids, names, births, movie_ids, titles, years = columns
+    graph = CompactGraph(person_ids, movie_ids, *arrays)
+    return graph, {"names": names, "births": births,
+                   "titles": titles, "years": years}
+
+
+def _string_offsets(column):
+    """
+    Returns the character offset of every string in a column,
+    followed by the total length.
+    """
+    offsets = array(OFFSET_TYPECODE, [0])
+    total = 0
+    for string in column:
+        total += len(string)
+        offsets.append(total)
+    return offsets
+
+
+def _padding(nbytes):
+    """
+    Returns the zero bytes that align a section of `nbytes` to 8 bytes.
+    """
+    return bytes(-nbytes % 8)
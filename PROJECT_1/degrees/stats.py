@@ -0,0 +1,101 @@
+"""
+Instrumentation for the degrees searches.
+
+A SearchStats can be passed wherever a search takes a `stats` dict. It
+is filled the same way, and the dict searches of degrees also report
+through it the peak frontier size, the time spent generating neighbors
+and the time of every completed breadth-first layer. When it finishes,
+the statistics are sent as one record (a plain dict) to a sink, such as
+json_sink, so slow queries can be profiled without changing the search.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class SearchStats(dict):
+    """
+    A dict of search statistics with hooks the searches call while
+    running. `sink` is called with the record of each finished search,
+    and `fields` are added to every record.
+    """
+
+    def __init__(self, sink=None, **fields):
+        super().__init__()
+        self.sink = sink
+        self.fields = fields
+        self.started = None
+        self.layer_started = None
+
+    def start(self, **fields):
+        """
+        Clears the statistics of any previous search and starts timing.
+        """
+        self.clear()
+        self.update(self.fields)
+        self.update(fields)
+        self["peak_frontier"] = 0
+        self["neighbor_seconds"] = 0.0
+        self["layer_seconds"] = []
+        self.started = self.layer_started = time.perf_counter()
+
+    def running(self):
+        return self.started is not None
+
+    def frontier(self, size):
+        """
+        Records the current frontier size.
+        """
+        if size > self["peak_frontier"]:
+            self["peak_frontier"] = size
+
+    def neighbors(self, seconds):
+        """
+        Adds the time taken to generate the neighbors of one state.
+        """
+        self["neighbor_seconds"] += seconds
+
+    def layer(self):
+        """
+        Records the end of a breadth-first layer.
+        """
+        now = time.perf_counter()
+        self["layer_seconds"].append(now - self.layer_started)
+        self.layer_started = now
+
+    def finish(self, **fields):
+        """
+        Stops timing, adds `fields` and the memory high-water marks,
+        and sends the record to the sink.
+        """
+        self["seconds"] = time.perf_counter() - self.started
+        self.started = None
+        self.update(fields)
+        if resource is not None:
+            self["max_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if tracemalloc.is_tracing():
+            self["traced_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        if self.sink is not None:
+            self.sink(self.record())
+
+    def record(self):
+        """
+        Returns the statistics as a plain dict.
+        """
+        return dict(self)
+
+
+def json_sink(file=sys.stderr):
+    """
+    Returns a sink that writes each record to `file` as a JSON line.
+    """
+    def sink(record):
+        file.write(json.dumps(record) + "\n")
+    return sink
@@ -0,0 +1,361 @@
+"""
+Benchmarks for the tictactoe engines.
+
+Usage: python benchmark.py table|positions|bitboard|mnk|book|worker|mcts|parallel
+"""
+
+import functools
+import math
+import os
+import random
+import sys
+import time
+
+import bitboard
+import book
+import check
+import mcts
+import mnk
+import parallel
+import tictactoe as ttt
+import worker
+from worker import MoveWorker
+
+
+def play_game(engine):
+    """
+    Plays one game of an engine against itself from the initial state.
+    Returns the (nodes, seconds) of every move.
+    """
+    board = ttt.initial_state()
+    moves = []
+    while not ttt.terminal(board):
+        stats = {}
+        start = time.perf_counter()
+        action = ttt.minimax(board, engine, stats)
+        moves.append((stats["nodes"], time.perf_counter() - start))
+        board = ttt.result(board, action)
+    return moves
+
+
+def bench_table(engines=("full", "table")):
+    """
+    Compares nodes searched and latency of each move of a self-play
+    game, starting with an empty transposition table.
+    """
+    ttt.transposition.clear()
+    for engine in engines:
+        moves = play_game(engine)
+        print(f"{engine}:")
+        for i, (nodes, seconds) in enumerate(moves, 1):
+            print(f"  move {i}: {nodes:7d} nodes, {seconds * 1000:9.3f}ms")
+        print(f"  total: {sum(n for n, _ in moves)} nodes, "
+              f"{sum(s for _, s in moves):.3f}s")
+
+
+def bench_positions(engines=("full", "alphabeta", "table")):
+    """
+    Compares the nodes searched and time taken by each engine to choose
+    a move in every non-terminal reachable position. The transposition
+    table is emptied before each position, so every search starts cold.
+    """
+    positions = check.reachable_positions()
+    print(f"{len(positions)} positions")
+    for engine in engines:
+        nodes = 0
+        seconds = 0
+        for board in positions:
+            ttt.transposition.clear()
+            stats = {}
+            start = time.perf_counter()
+            ttt.minimax(board, engine, stats)
+            seconds += time.perf_counter() - start
+            nodes += stats["nodes"]
+        print(f"{engine:>9}: {nodes:9d} nodes, {seconds:.3f}s")
+
+
+def time_calls(function, arguments):
+    """
+    Returns the mean seconds per call of `function` over `arguments`,
+    each a tuple of positional arguments.
+    """
+    start = time.perf_counter()
+    for args in arguments:
+        function(*args)
+    return (time.perf_counter() - start) / len(arguments)
+
+
+def bench_bitboard():
+    """
+    Compares the per-call cost of player, actions, result and winner on
+    lists of lists and on bitboards over every reachable position, and
+    the per-node cost of a full minimax search of the empty board.
+    """
+    positions = check.reachable_positions()
+    states = [bitboard.from_board(board) for board in positions]
+    first_actions = [(board, next(iter(ttt.actions(board)))) for board in positions]
+    first_moves = [(state, next(bitboard.actions(state))) for state in states]
+
+    rows = (
+        ("player", ttt.player, [(b,) for b in positions],
+         bitboard.player, [(s,) for s in states]),
+        ("actions", lambda b: list(ttt.actions(b)), [(b,) for b in positions],
+         lambda s: list(bitboard.actions(s)), [(s,) for s in states]),
+        ("result", ttt.result, first_actions, bitboard.result, first_moves),
+        ("winner", ttt.winner, [(b,) for b in positions],
+         bitboard.winner, [(s,) for s in states]),
+    )
+    for name, lists, list_args, bits, bit_args in rows:
+        list_seconds = time_calls(lists, list_args)
+        bit_seconds = time_calls(bits, bit_args)
+        print(f"{name:>8}: {list_seconds * 1e6:6.2f}us lists, "
+              f"{bit_seconds * 1e6:6.2f}us bitboard "
+              f"({list_seconds / bit_seconds:.1f}x)")
+
+    for engine in ("full", "bitboard"):
+        stats = {}
+        start = time.perf_counter()
+        ttt.minimax(ttt.initial_state(), engine, stats)
+        seconds = time.perf_counter() - start
+        print(f"{engine:>8} minimax: {stats['nodes']} nodes, {seconds:.3f}s, "
+              f"{seconds / stats['nodes'] * 1e6:.2f}us per node")
+
+
+# Boards (m, n, k) and seconds per move of the m,n,k benchmark, and the
+# number of moves played on each
+MNK_BOARDS = ((3, 3, 3), (4, 4, 4), (7, 7, 4), (15, 15, 5))
+MNK_BUDGET = 0.5
+MNK_MOVES = 10
+
+
+def bench_mnk():
+    """
+    Plays the first moves of a self-play game on each board in
+    MNK_BOARDS and reports the depth reached, nodes per second and
+    the slowest move against the time budget.
+    """
+    for m, n, k in MNK_BOARDS:
+        game = mnk.MNKGame(m, n, k)
+        board = game.initial_state()
+        depths = []
+        nodes = 0
+        seconds = []
+        while not game.terminal(board) and len(seconds) < MNK_MOVES:
+            stats = {}
+            start = time.perf_counter()
+            action = mnk.best_move(game, board, MNK_BUDGET, stats=stats)
+            seconds.append(time.perf_counter() - start)
+            depths.append(stats["depth"])
+            nodes += stats["nodes"]
+            board = game.result(board, action)
+        print(f"{m}x{n}, k={k}: {len(seconds)} moves, depth "
+              f"{min(depths)}-{max(depths)}, {nodes / sum(seconds):.0f} nodes/s, "
+              f"slowest move {max(seconds):.3f}s (budget {MNK_BUDGET}s)")
+
+
+def bench_book():
+    """
+    Reports the time to build, write and load the opening book, and
+    compares the latency of the first move and of a move in every
+    reachable position with and without the book.
+    """
+    ttt.transposition.clear()
+    start = time.perf_counter()
+    table = book.build()
+    build_seconds = time.perf_counter() - start
+    path = book.DEFAULT_PATH + ".bench"
+    try:
+        start = time.perf_counter()
+        book.write(path, table)
+        write_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        assert book.load(path) == table
+        load_seconds = time.perf_counter() - start
+    finally:
+        os.remove(path)
+    print(f"build: {build_seconds:.3f}s, write: {write_seconds * 1000:.3f}ms, "
+          f"load: {load_seconds * 1000:.3f}ms, {len(book.MAGIC) + len(table)} bytes")
+
+    positions = check.reachable_positions()
+    empty = [(ttt.initial_state(),)]
+    loaded = ttt.opening_book
+    try:
+        ttt.opening_book = table
+        first = time_calls(ttt.book_minimax, empty)
+        every = time_calls(ttt.book_minimax, [(b,) for b in positions])
+        print(f"book: first move {first * 1e6:.2f}us, "
+              f"mean move {every * 1e6:.2f}us")
+    finally:
+        ttt.opening_book = loaded
+
+    ttt.transposition.clear()
+    first = time_calls(ttt.table_minimax, empty)
+    every = time_calls(ttt.table_minimax, [(b,) for b in positions])
+    print(f"table: first move {first * 1e6:.2f}us cold, "
+          f"mean move {every * 1e6:.2f}us warm")
+
+
+# Frame rate of the simulated runner loop
+FPS = 60
+
+
+def bench_worker(engine="full"):
+    """
+    Simulates the frames of runner.py at FPS while a slow search runs,
+    first called on the loop as runner.py used to, then on a MoveWorker
+    thread and process polled each frame, and reports the frame times.
+    """
+    board = ttt.initial_state()
+    frame = 1 / FPS
+
+    start = time.perf_counter()
+    ttt.minimax(board, engine)
+    print(f"on the loop: one frame of {time.perf_counter() - start:.3f}s")
+
+    for process in (False, True) if worker.FORK else (False,):
+        move_worker = MoveWorker(functools.partial(ttt.minimax, engine=engine),
+                                 process)
+        move_worker.start(board)
+        frames = []
+        last = time.perf_counter()
+        while not move_worker.poll()[0]:
+            time.sleep(max(0, frame - (time.perf_counter() - last)))
+            now = time.perf_counter()
+            frames.append(now - last)
+            last = now
+        move_worker.close()
+        frames.sort()
+        print(f"on a {'process' if process else 'thread'}: {len(frames)} frames, "
+              f"median {frames[len(frames) // 2] * 1000:.1f}ms, "
+              f"longest {frames[-1] * 1000:.1f}ms (target {frame * 1000:.1f}ms)")
+
+
+# Positions sampled for move quality, and the engines compared on them
+MCTS_SAMPLE = 300
+MCTS_ENGINES = (
+    ("minimax depth 1", lambda game: lambda board: mnk.best_move(game, board, 60, 1)),
+    ("minimax depth 2", lambda game: lambda board: mnk.best_move(game, board, 60, 2)),
+    ("minimax depth 3", lambda game: lambda board: mnk.best_move(game, board, 60, 3)),
+    ("mcts 100", lambda game: mcts.MCTS(game, 100, seed=0).best_move),
+    ("mcts 1000", lambda game: mcts.MCTS(game, 1000, seed=0).best_move),
+    ("mcts 250x4", lambda game: mcts.MCTS(game, 250, rollouts=4, seed=0).best_move),
+)
+
+# Games played on the larger board, and the seconds per MCTS move
+MCTS_BOARD = (7, 7, 4)
+MCTS_GAMES = 4
+MCTS_BUDGET = 0.5
+
+
+def bench_mcts():
+    """
+    Compares MCTS with depth-limited minimax: the share of moves that
+    keep the minimax value over a sample of 3x3 positions and their
+    mean time, then games on a larger board between MCTS under a time
+    budget and a depth 2 minimax.
+    """
+    game = mnk.MNKGame(3, 3, 3)
+    positions = random.Random(0).sample(check.reachable_positions(), MCTS_SAMPLE)
+    values = []
+    for board in positions:
+        turn = ttt.player(board)
+        other = ttt.O if turn == ttt.X else ttt.X
+        values.append({action: ttt.table_value(ttt.flatten(ttt.result(board, action)),
+                                               other)
+                       for action in ttt.actions(board)})
+    for name, engine in MCTS_ENGINES:
+        optimal = 0
+        start = time.perf_counter()
+        for board, value in zip(positions, values):
+            best = (max if ttt.player(board) == ttt.X else min)(value.values())
+            optimal += value[engine(game)(board)] == best
+        seconds = (time.perf_counter() - start) / len(positions)
+        print(f"3x3 {name:>15}: {optimal / len(positions):6.1%} optimal, "
+              f"{seconds * 1000:7.2f}ms per move")
+
+    m, n, k = MCTS_BOARD
+    game = mnk.MNKGame(m, n, k)
+    results = {"mcts": 0, "minimax": 0, "tie": 0}
+    seconds = {"mcts": [], "minimax": []}
+    for i in range(MCTS_GAMES):
+        search = mcts.MCTS(game, None, MCTS_BUDGET, seed=i)
+        players = {ttt.X: "mcts", ttt.O: "minimax"} if i % 2 == 0 \
+            else {ttt.X: "minimax", ttt.O: "mcts"}
+        board = game.initial_state()
+        while not game.terminal(board):
+            name = players[game.player(board)]
+            start = time.perf_counter()
+            if name == "mcts":
+                action = search.best_move(board)
+            else:
+                action = mnk.best_move(game, board, 60, 2)
+            seconds[name].append(time.perf_counter() - start)
+            board = game.result(board, action)
+        win = game.winner(board)
+        results[players[win] if win else "tie"] += 1
+    print(f"{m}x{n}, k={k}, {MCTS_GAMES} games: {results}, mean move "
+          f"mcts {sum(seconds['mcts']) / len(seconds['mcts']):.3f}s, "
+          f"minimax depth 2 {sum(seconds['minimax']) / len(seconds['minimax']):.3f}s")
+
+
+# Positions (m, n, k, random opening moves, depth) of the root-parallel
+# benchmark, and the pool sizes compared with the serial search
+PARALLEL_SEARCHES = ((7, 7, 4, 4, 6), (9, 9, 5, 4, 5), (15, 15, 5, 6, 4))
+PARALLEL_PROCESSES = (1, 2, 4)
+
+
+def bench_parallel():
+    """
+    Compares the serial root search of mnk.Search with parallel_root
+    on pools of each size in PARALLEL_PROCESSES, checking they pick the
+    same action, and reports nodes, time and speedup.
+    """
+    print(f"{os.cpu_count()} CPUs")
+    for m, n, k, openings, depth in PARALLEL_SEARCHES:
+        game = mnk.MNKGame(m, n, k)
+        rng = random.Random(0)
+        board = game.initial_state()
+        for _ in range(openings):
+            board = game.result(board, rng.choice(sorted(game.actions(board))))
+        side = 1 if game.player(board) == mnk.X else 2
+
+        start = time.perf_counter()
+        search = mnk.Search(game, board, math.inf)
+        cell, _ = search.root(depth, side)
+        serial = time.perf_counter() - start
+        print(f"{m}x{n}, k={k}, depth {depth}: serial {search.nodes} nodes, "
+              f"{serial:.3f}s")
+
+        for processes in PARALLEL_PROCESSES:
+            parallel.get_pool(processes)
+            stats = {}
+            start = time.perf_counter()
+            action = parallel.parallel_root(game, board, depth, processes, stats)
+            seconds = time.perf_counter() - start
+            assert action == divmod(cell, n), (action, cell)
+            print(f"  {processes} processes: {stats['nodes']} nodes, "
+                  f"{seconds:.3f}s, {serial / seconds:.2f}x")
+    parallel.close()
+
+
+# Benchmarks that can be selected from the command line
+BENCHMARKS = {
+    "table": bench_table,
+    "positions": bench_positions,
+    "bitboard": bench_bitboard,
+    "mnk": bench_mnk,
+    "book": bench_book,
+    "worker": bench_worker,
+    "mcts": bench_mcts,
+    "parallel": bench_parallel,
+}
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in BENCHMARKS:
+        sys.exit(f"Usage: python benchmark.py {'|'.join(BENCHMARKS)}")
+    BENCHMARKS[sys.argv[1]]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Tic Tac Toe on bitboards.
+
+A state is a pair of 9-bit integers (x, o) with bit 3 * i + j set where
+that player has a mark on row i, column j. Whose turn it is follows from
+the two bit counts, the free cells are the bits of neither, a move is
+one bit, and a win is looked up in a table of the 512 sets of cells.
+from_board and to_board convert to and from the list-of-lists boards of
+tictactoe.
+"""
+
+# The marks of tictactoe boards
+X = "X"
+O = "O"
+EMPTY = None
+
+# All nine cells, and the eight winning lines
+FULL = 0b111111111
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# Whether each of the 512 sets of cells covers a winning line
+WINNING = bytes(any(cells & mask == mask for mask in WIN_MASKS)
+                for cells in range(FULL + 1))
+
+
+def initial_state():
+    return 0, 0
+
+
+def from_board(board):
+    """
+    Returns the (x, o) state of a list-of-lists board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(state):
+    """
+    Returns the list-of-lists board of an (x, o) state.
+    """
+    x, o = state
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+             for j in range(3)] for i in range(3)]
+
+
+def to_action(move):
+    """
+    Returns the (i, j) action of a move bit.
+    """
+    return divmod(move.bit_length() - 1, 3)
+
+
+def to_move(action):
+    """
+    Returns the move bit of an (i, j) action.
+    """
+    return 1 << (3 * action[0] + action[1])
+
+
+def player(state):
+    """
+    Returns the player who has the next turn.
+    """
+    x, o = state
+    return X if x.bit_count() == o.bit_count() else O
+
+
+def actions(state):
+    """
+    Yields the free cells as move bits, lowest first.
+    """
+    x, o = state
+    free = FULL & ~(x | o)
+    while free:
+        move = free & -free
+        yield move
+        free ^= move
+
+
+def result(state, move):
+    """
+    Returns the state after the player to move takes the `move` bit.
+    """
+    x, o = state
+    if (x | o) & move:
+        raise ValueError("Invalid Action")
+    if x.bit_count() == o.bit_count():
+        return x | move, o
+    return x, o | move
+
+
+def winner(state):
+    x, o = state
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def terminal(state):
+    x, o = state
+    return winner(state) is not None or x | o == FULL
+
+
+def utility(state):
+    win = winner(state)
+    return 1 if win == X else -1 if win == O else 0
+
+
+def value(x, o, x_to_move, stats=None):
+    """
+    Returns the minimax value of a state by searching its whole game
+    tree, counting nodes in `stats`.
+    """
+    if stats is not None:
+        stats["nodes"] += 1
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    free = FULL & ~(x | o)
+    if not free:
+        return 0
+
+    best = -2 if x_to_move else 2
+    while free:
+        move = free & -free
+        free ^= move
+        if x_to_move:
+            best = max(best, value(x | move, o, False, stats))
+        else:
+            best = min(best, value(x, o | move, True, stats))
+    return best
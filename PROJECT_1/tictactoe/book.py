@@ -0,0 +1,126 @@
+"""
+Opening book: the minimax answer for every reachable Tic Tac Toe position.
+
+Usage: python book.py [filename]
+
+Enumerates every non-terminal position reachable from the initial state,
+solves each with the transposition-table engine, and writes the optimal
+action and value of each to a file (tictactoe.book next to this module by
+default). The file is a magic header followed by one byte per base-3
+board encoding, so a position is looked up by indexing with its encoding.
+"""
+
+import os
+import sys
+import time
+
+BOOK_NAME = "tictactoe.book"
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), BOOK_NAME)
+
+MAGIC = b"TTTBOOK\x01"
+
+# Number of base-3 encodings of a 3x3 board, one byte each in the file
+SIZE = 3 ** 9
+
+# Byte of a position that is not in the book (terminal or unreachable)
+MISSING = 0
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [filename]")
+    path = sys.argv[1] if len(sys.argv) == 2 else DEFAULT_PATH
+
+    start = time.perf_counter()
+    table = build()
+    seconds = time.perf_counter() - start
+    write(path, table)
+    entries = sum(entry != MISSING for entry in table)
+    print(f"Solved {entries} positions in {seconds:.3f}s "
+          f"and wrote {len(MAGIC) + len(table)} bytes to {path}.")
+
+
+def pack(action, value):
+    """
+    Returns the byte of a flat action index (0 to 8) and a value
+    (-1, 0 or 1).
+    """
+    return 1 + action * 3 + value + 1
+
+
+def unpack(entry):
+    """
+    Returns the (i, j) action and value of a book byte.
+    """
+    action, value = divmod(entry - 1, 3)
+    return divmod(action, 3), value - 1
+
+
+def build():
+    """
+    Returns the book table: for each non-terminal position reachable
+    from the initial state, the byte of the action table_minimax picks
+    (the same as full_minimax) and the position's value.
+    """
+    # Imported here because tictactoe loads the book when it is imported
+    import tictactoe as ttt
+
+    table = bytearray(SIZE)
+    start = ttt.initial_state()
+    seen = {ttt.encode(ttt.flatten(start))}
+    boards = [start]
+    for board in boards:
+        if ttt.terminal(board):
+            continue
+        cells = ttt.flatten(board)
+        action = ttt.table_minimax(board)
+        value = ttt.table_value(cells, ttt.player(board))
+        table[ttt.encode(cells)] = pack(action[0] * 3 + action[1], value)
+        for child_action in ttt.actions(board):
+            child = ttt.result(board, child_action)
+            key = ttt.encode(ttt.flatten(child))
+            if key not in seen:
+                seen.add(key)
+                boards.append(child)
+    return bytes(table)
+
+
+def write(path, table):
+    """
+    Writes a book table to `path`.
+    """
+    # Write to a temporary file first so a crash never leaves a partial book
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(table)
+    os.replace(temporary, path)
+
+
+def load(path=DEFAULT_PATH):
+    """
+    Returns the book table in `path`, or None if there is no valid book.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) != len(MAGIC) + SIZE or not data.startswith(MAGIC):
+        return None
+    return data[len(MAGIC):]
+
+
+def lookup(table, key):
+    """
+    Returns the (action, value) of the board with base-3 encoding `key`,
+    or None if it is not in the book.
+    """
+    entry = table[key]
+    if entry == MISSING:
+        return None
+    return unpack(entry)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Consistency checks for the tictactoe engines.
+
+Usage: python check.py
+
+Checks every engine against full_minimax on every position reachable
+from the initial state, a freshly built opening book, the m,n,k engine
+on the 3x3 game, MCTS, root-parallel search, the background move worker
+and the self-play harness, and exits with an error on the first mismatch.
+"""
+
+import functools
+import math
+import random
+
+import book
+import mcts
+import mnk
+import parallel
+import selfplay
+import tictactoe as ttt
+import worker
+from worker import MoveWorker
+
+
+def reachable_positions():
+    """
+    Returns every non-terminal board reachable from the initial state,
+    each once, in breadth-first order.
+    """
+    start = ttt.initial_state()
+    seen = {ttt.flatten(start)}
+    boards = [start]
+    positions = []
+    for board in boards:
+        if ttt.terminal(board):
+            continue
+        positions.append(board)
+        for action in ttt.actions(board):
+            child = ttt.result(board, action)
+            cells = ttt.flatten(child)
+            if cells not in seen:
+                seen.add(cells)
+                boards.append(child)
+    return positions
+
+
+def expected_actions(positions):
+    """
+    Returns the full_minimax action of every position, by flat board.
+    """
+    return {ttt.flatten(board): ttt.full_minimax(board) for board in positions}
+
+
+def check_engine(engine, positions, expected):
+    """
+    Checks that an engine picks the full_minimax action everywhere.
+    """
+    for board in positions:
+        action = ttt.minimax(board, engine)
+        assert action == expected[ttt.flatten(board)], (engine, board, action)
+
+
+def check_book(positions, expected):
+    """
+    Checks that a freshly built book holds the full_minimax action and
+    the value of every position, and nothing else.
+    """
+    table = book.build()
+    assert sum(entry != book.MISSING for entry in table) == len(positions)
+    for board in positions:
+        cells = ttt.flatten(board)
+        action, value = book.lookup(table, ttt.encode(cells))
+        assert action == expected[cells], (board, action)
+        assert value == ttt.table_value(cells, ttt.player(board)), (board, value)
+
+
+def check_mnk(positions):
+    """
+    Checks that MNKGame(3, 3, 3) agrees with tictactoe on every position
+    and that best_move, searching to the end, always keeps the value of
+    the optimal move.
+    """
+    game = mnk.MNKGame(3, 3, 3)
+    for board in positions + [ttt.result(board, action) for board in positions
+                              for action in ttt.actions(board)]:
+        assert game.winner(board) == ttt.winner(board), board
+        assert game.terminal(board) == ttt.terminal(board), board
+        assert game.player(board) == ttt.player(board), board
+        assert game.actions(board) == ttt.actions(board), board
+
+    for board in positions:
+        turn = ttt.player(board)
+        other = ttt.O if turn == ttt.X else ttt.X
+        expected = ttt.table_value(ttt.flatten(ttt.result(board, ttt.minimax(board))),
+                                   other)
+        action = mnk.best_move(game, board, budget=60)
+        value = ttt.table_value(ttt.flatten(ttt.result(board, action)), other)
+        assert value == expected, (board, action)
+
+
+def check_mcts():
+    """
+    Checks that MCTS, on the tictactoe module and on MNKGame, never
+    loses to random play, reuses its tree and stops on a terminal board.
+    """
+    for game in (ttt, mnk.MNKGame(3, 3, 3)):
+        for seed in range(10):
+            search = mcts.MCTS(game, 500, seed=seed)
+            rng = random.Random(seed)
+            board = game.initial_state()
+            reused = 0
+            while not game.terminal(board):
+                if game.player(board) == ttt.X:
+                    stats = {}
+                    action = search.best_move(board, stats)
+                    reused += stats["reused"]
+                else:
+                    action = rng.choice(sorted(game.actions(board)))
+                board = game.result(board, action)
+            assert game.utility(board) != -1, board
+            assert reused > 0
+            assert search.best_move(board) is None
+
+    # Even a spent budget runs one iteration, and no budget is refused
+    board = ttt.initial_state()
+    assert mcts.MCTS(ttt, None, budget=0).best_move(board) in ttt.actions(board)
+    game = mnk.MNKGame(15, 15, 5)
+    assert mcts.MCTS(game, None, budget=1e-4).best_move(game.initial_state())
+    for iterations in (0, -1):
+        try:
+            mcts.MCTS(ttt, iterations)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"MCTS accepted {iterations} iterations")
+
+
+def check_parallel(positions, expected):
+    """
+    Checks that root-parallel search picks the same action as the serial
+    searches: full_minimax on the 3x3 game, and mnk.Search.root on
+    larger boards.
+    """
+    try:
+        for board in positions:
+            action = parallel.parallel_minimax(board, processes=2)
+            assert action == expected[ttt.flatten(board)], (board, action)
+
+        rng = random.Random(0)
+        for m, n, k, depth in ((4, 4, 3, 4), (7, 7, 4, 3), (15, 15, 5, 2)):
+            game = mnk.MNKGame(m, n, k)
+            board = game.initial_state()
+            for _ in range(5):
+                board = game.result(board, rng.choice(sorted(game.actions(board))))
+                if game.terminal(board):
+                    break
+                side = 1 if game.player(board) == mnk.X else 2
+                cell, _ = mnk.Search(game, board, math.inf).root(depth, side)
+                action = parallel.parallel_root(game, board, depth, processes=2)
+                assert action == divmod(cell, n), (board, action)
+    finally:
+        parallel.close()
+
+
+def check_worker(process):
+    """
+    Checks that the worker returns the move of its function, drops the
+    move of a cancelled search and passes on errors.
+    """
+    board = ttt.initial_state()
+    worker = MoveWorker(ttt.minimax, process)
+    assert worker.poll() == (False, None)
+    worker.start(board)
+    assert worker.busy()
+    worker.search.wait()
+    assert worker.poll() == (True, ttt.minimax(board))
+    assert not worker.busy()
+
+    # Only a process can stop a long search
+    if process:
+        worker.function = functools.partial(ttt.minimax, engine="full")
+    worker.start(board)
+    search = worker.search
+    worker.cancel()
+    assert not worker.busy() and worker.poll() == (False, None)
+    if not process:
+        search.wait()
+
+    worker.function = functools.partial(ttt.result, action=(3, 3))
+    worker.start(board)
+    worker.search.wait()
+    try:
+        worker.poll()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("worker hid the error of its function")
+    worker.close()
+
+
+def check_selfplay():
+    """
+    Checks that optimal engines never lose to random play, always tie
+    each other, and that a pool of processes plays the same games.
+    """
+    summary = selfplay.tournament("book", selfplay.RANDOM, 50)
+    assert summary["results"]["o_wins"] == 0, summary["results"]
+    assert summary["config"]["book"] == (ttt.opening_book is not None)
+    summary = selfplay.tournament(selfplay.RANDOM, "alphabeta", 50)
+    assert summary["results"]["x_wins"] == 0, summary["results"]
+    summary = selfplay.tournament("table", "bitboard", 10, openings=1)
+    assert summary["results"]["ties"] == 10, summary["results"]
+
+    serial = selfplay.tournament("table", "alphabeta", 20, openings=2)
+    pooled = selfplay.tournament("table", "alphabeta", 20, openings=2, processes=2)
+    for key in ("results", "moves_digest"):
+        assert serial[key] == pooled[key], key
+    for mark in (ttt.X, ttt.O):
+        assert serial["players"][mark]["nodes"] == pooled["players"][mark]["nodes"]
+
+
+def main():
+    positions = reachable_positions()
+    print(f"{len(positions)} non-terminal positions")
+    expected = expected_actions(positions)
+    for engine in ttt.ENGINES:
+        if engine != "full":
+            check_engine(engine, positions, expected)
+            print(f"{engine} agrees with full minimax")
+    check_book(positions, expected)
+    print("a built book agrees with full minimax")
+    check_mnk(positions)
+    print("m,n,k engine plays the 3x3 game optimally")
+    check_mcts()
+    print("MCTS never loses to random play")
+    check_parallel(positions, expected)
+    print("root-parallel search agrees with the serial searches")
+    for process in (False, True) if worker.FORK else (False,):
+        check_worker(process)
+        print(f"move worker on a {'process' if process else 'thread'} "
+              "returns, cancels and raises as expected")
+    check_selfplay()
+    print("self-play is optimal and the same in a process pool")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Monte Carlo tree search (UCT) for tictactoe-family games.
+
+An MCTS plays any game with the player, actions, result, terminal and
+utility functions of tictactoe, such as the tictactoe module itself or
+an mnk.MNKGame. Each iteration walks down the tree by the UCT rule,
+adds one child, plays a batch of random games from it and backs up
+their results. best_move runs until an iteration or time budget is
+spent and returns the most visited action. The tree below the chosen
+move is kept, so the next call starts from the subtree of the position
+the opponent's reply led to.
+"""
+
+import math
+import random
+import time
+
+X = "X"
+O = "O"
+
+# Default iterations per move, and random games played per iteration
+ITERATIONS = 1000
+ROLLOUTS = 1
+
+# Weight of exploration in the UCT rule
+EXPLORATION = math.sqrt(2)
+
+
+class Node():
+    """
+    A position in the search tree, with its free cells and the actions
+    not yet expanded. `wins` counts the results of the random games
+    through it, 1 for a win and 0.5 for a tie, for the player who moved
+    into it.
+    """
+
+    __slots__ = ("board", "action", "parent", "children", "untried",
+                 "visits", "wins", "mover", "over", "free")
+
+    def __init__(self, game, board, action=None, parent=None, rng=None):
+        self.board = board
+        self.action = action
+        self.parent = parent
+        self.children = []
+        self.visits = 0
+        self.wins = 0.0
+        self.mover = None if parent is None else parent.turn(game)
+        self.free = sorted(game.actions(board))
+        self.untried = self.free[:]
+
+        # Games that can check the last move for a win need not scan the board
+        if action is not None and hasattr(game, "wins_at"):
+            self.over = not self.untried or game.wins_at(board, action)
+        else:
+            self.over = game.terminal(board)
+        if self.over:
+            self.untried = []
+        elif rng is not None:
+            rng.shuffle(self.untried)
+
+    def turn(self, game):
+        """
+        Returns the player to move at this node.
+        """
+        if self.mover is not None:
+            return O if self.mover == X else X
+        return game.player(self.board)
+
+    def select(self, exploration):
+        """
+        Returns the child with the highest upper confidence bound.
+        """
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: (
+            child.wins / child.visits
+            + exploration * math.sqrt(log_visits / child.visits)))
+
+    def size(self):
+        """
+        Returns the number of nodes in the tree below and including this one.
+        """
+        return 1 + sum(child.size() for child in self.children)
+
+
+class MCTS():
+    """
+    A UCT search over `game` that keeps its tree between moves. Each
+    move runs `iterations` iterations, or until `budget` seconds pass
+    if `budget` is set, or whichever comes first if both are set, with
+    `rollouts` random games per iteration.
+    """
+
+    def __init__(self, game, iterations=ITERATIONS, budget=None,
+                 rollouts=ROLLOUTS, exploration=EXPLORATION, seed=None):
+        if iterations is None and budget is None:
+            raise ValueError("MCTS needs an iteration or a time budget")
+        if iterations is not None and iterations < 1:
+            raise ValueError("MCTS needs at least one iteration per move")
+        if rollouts < 1:
+            raise ValueError("MCTS needs at least one rollout per iteration")
+        self.game = game
+        self.iterations = iterations
+        self.budget = budget
+        self.rollouts = rollouts
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.root = None
+
+    def best_move(self, board, stats=None):
+        """
+        Returns the most visited action after searching from `board`, or
+        None on a terminal board. If `stats` is a dict, it gets the
+        iterations run, the visits reused from the previous tree, the
+        size of the tree and the seconds taken.
+        """
+        start = time.perf_counter()
+        root = self.reuse(board)
+        reused = root.visits
+        if root.over:
+            return None
+        deadline = None if self.budget is None else start + self.budget
+
+        # The deadline is checked after each iteration, so there is always
+        # at least one child to choose from
+        iterations = 0
+        while self.iterations is None or iterations < self.iterations:
+            self.iterate(root)
+            iterations += 1
+            if deadline is not None and iterations % 16 == 1 \
+                    and time.perf_counter() > deadline:
+                break
+
+        best = max(root.children, key=lambda child: child.visits)
+        if stats is not None:
+            stats["iterations"] = iterations
+            stats["reused"] = reused
+            stats["nodes"] = root.size()
+            stats["seconds"] = time.perf_counter() - start
+        return best.action
+
+    def reuse(self, board):
+        """
+        Makes the node of `board` the root, taking it from the previous
+        tree if it is the previous root or two moves below it, and
+        returns it.
+        """
+        root = self.root
+        candidates = []
+        if root is not None:
+            candidates.append(root)
+            for child in root.children:
+                candidates.append(child)
+                candidates.extend(child.children)
+        for node in candidates:
+            if node.board == board:
+                node.parent = None
+                node.mover = None
+                self.root = node
+                return node
+        self.root = Node(self.game, [row[:] for row in board], rng=self.rng)
+        return self.root
+
+    def iterate(self, root):
+        """
+        Runs one selection, expansion, simulation and backup from `root`.
+        """
+        node = root
+        while not node.untried and node.children:
+            node = node.select(self.exploration)
+        if node.untried:
+            action = node.untried.pop()
+            child = Node(self.game, self.game.result(node.board, action),
+                         action, node, self.rng)
+            node.children.append(child)
+            node = child
+
+        # Sum the random games from the node as X's score, 1, 0.5 or 0
+        x_score = 0.0
+        for _ in range(self.rollouts):
+            x_score += (self.rollout(node) + 1) / 2
+
+        while node is not None:
+            node.visits += self.rollouts
+            if node.mover == X:
+                node.wins += x_score
+            elif node.mover == O:
+                node.wins += self.rollouts - x_score
+            node = node.parent
+
+    def rollout(self, node):
+        """
+        Plays random moves from a node to the end and returns the utility.
+        """
+        game = self.game
+        board = node.board
+        if node.over:
+            return game.utility(board)
+
+        # Games that can check the last move for a win are played in place
+        if hasattr(game, "wins_at"):
+            board = [row[:] for row in board]
+            free = node.free[:]
+            self.rng.shuffle(free)
+            turn = node.turn(game)
+            for i, j in free:
+                board[i][j] = turn
+                if game.wins_at(board, (i, j)):
+                    return 1 if turn == X else -1
+                turn = O if turn == X else X
+            return 0
+
+        while not game.terminal(board):
+            board = game.result(board, self.rng.choice(sorted(game.actions(board))))
+        return game.utility(board)
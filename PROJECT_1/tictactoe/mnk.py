@@ -0,0 +1,301 @@
+"""
+m,n,k games: Tic Tac Toe on an m x n board where k in a row wins.
+
+MNKGame has the same functions as tictactoe (player, actions, result,
+winner, terminal and utility) for list-of-lists boards of any size, and
+wins_at checks for a win through the last move only. best_move picks a
+move with iterative-deepening alpha-beta search under a time budget,
+scoring unfinished positions with a heuristic, so it answers quickly on
+boards such as 7x7 or 15x15 where a full minimax cannot finish.
+"""
+
+import math
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Seconds best_move may spend by default
+BUDGET = 1.0
+
+# Score of a win, less the number of moves it takes
+WIN_SCORE = 10 ** 9
+
+# Nodes searched between two looks at the clock
+CLOCK_INTERVAL = 1024
+
+# The four directions a line can run in: right, down and both diagonals
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class MNKGame():
+
+    def __init__(self, m=3, n=3, k=3):
+        if m < 1 or n < 1 or not 1 <= k <= max(m, n):
+            raise ValueError(f"no k-in-a-row possible for m={m}, n={n}, k={k}")
+        self.m = m
+        self.n = n
+        self.k = k
+
+    def initial_state(self):
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        x_elements = sum(row.count(X) for row in board)
+        o_elements = sum(row.count(O) for row in board)
+        return X if x_elements == o_elements else O
+
+    def actions(self, board):
+        return {(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] == EMPTY}
+
+    def result(self, board, action):
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) or board[i][j] != EMPTY:
+            raise ValueError("Invalid Action")
+        new_state = [row[:] for row in board]
+        new_state[i][j] = self.player(board)
+        return new_state
+
+    def wins_at(self, board, action):
+        """
+        Returns True if the mark at `action` is part of k in a row.
+        """
+        i, j = action
+        mark = board[i][j]
+        if mark == EMPTY:
+            return False
+        for di, dj in DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                r, c = i + sign * di, j + sign * dj
+                while 0 <= r < self.m and 0 <= c < self.n and board[r][c] == mark:
+                    count += 1
+                    r += sign * di
+                    c += sign * dj
+            if count >= self.k:
+                return True
+        return False
+
+    def winner(self, board):
+        for i in range(self.m):
+            for j in range(self.n):
+                if board[i][j] != EMPTY and self.wins_at(board, (i, j)):
+                    return board[i][j]
+        return None
+
+    def terminal(self, board):
+        return (self.winner(board) is not None
+                or all(cell != EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        win = self.winner(board)
+        return 1 if win == X else -1 if win == O else 0
+
+
+def best_move(game, board, budget=BUDGET, max_depth=None, stats=None):
+    """
+    Returns an action for the player to move, or None on a terminal board,
+    searching one move deeper at a time until `budget` seconds pass or
+    `max_depth` is reached, and keeping the best move of the deepest
+    completed search. If `stats` is a dict, it gets the nodes searched,
+    the depth completed and the score of the move.
+    """
+    if game.terminal(board):
+        return None
+    deadline = time.perf_counter() + budget
+    search = Search(game, board, deadline)
+    if max_depth is None:
+        max_depth = search.empty
+    side = 1 if game.player(board) == X else 2
+
+    move = None
+    score = 0
+    depth = 0
+    for depth in range(1, max_depth + 1):
+
+        # The first depth always completes, so there is always a move
+        search.deadline = deadline if depth > 1 else math.inf
+        try:
+            move, score = search.root(depth, side, move)
+        except Timeout:
+            depth -= 1
+            break
+
+        # A forced win or loss will not change with more depth
+        if abs(score) >= WIN_SCORE - search.empty:
+            break
+
+    if stats is not None:
+        stats["nodes"] = search.nodes
+        stats["depth"] = depth
+        stats["score"] = score
+    return divmod(move, game.n)
+
+
+class Timeout(Exception):
+    """
+    Raised inside a search once its deadline has passed.
+    """
+
+
+class Search():
+    """
+    Alpha-beta search state: the board as a flat list of 0 (empty),
+    1 (X) and 2 (O), updated in place by make and undone by unmake, with
+    the number of X and O marks in every line of k cells, so each move
+    updates the heuristic score and detects a win in O(k) per line.
+    """
+
+    def __init__(self, game, board, deadline, radius=None):
+        m, n, k = game.m, game.n, game.k
+        self.n = n
+        self.size = m * n
+        self.deadline = deadline
+        self.nodes = 0
+
+        # Value of a line holding only one player's marks, by their number
+        self.weights = [0] + [10 ** (count - 1) for count in range(1, k + 1)]
+        self.k = k
+
+        # Every line of k cells, and the lines through each cell
+        self.lines = []
+        self.cell_lines = [[] for _ in range(self.size)]
+        for i in range(m):
+            for j in range(n):
+                for di, dj in DIRECTIONS:
+                    end_i, end_j = i + (k - 1) * di, j + (k - 1) * dj
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        line = len(self.lines)
+                        cells = [(i + t * di) * n + j + t * dj for t in range(k)]
+                        self.lines.append(cells)
+                        for cell in cells:
+                            self.cell_lines[cell].append(line)
+        self.counts = [[0, 0, 0] for _ in self.lines]
+
+        # Moves are only tried next to existing marks on larger boards
+        if radius is None:
+            radius = m * n if m * n <= 16 else 1
+        self.neighbors = [
+            [r * n + c
+             for r in range(max(0, i - radius), min(m, i + radius + 1))
+             for c in range(max(0, j - radius), min(n, j + radius + 1))
+             if (r, c) != (i, j)]
+            for i in range(m) for j in range(n)]
+        self.near = [0] * self.size
+
+        self.cells = [0] * self.size
+        self.score = 0
+        self.empty = self.size
+        self.history = [0] * self.size
+        for i in range(m):
+            for j in range(n):
+                if board[i][j] != EMPTY:
+                    self.make(i * n + j, 1 if board[i][j] == X else 2)
+
+    def line_value(self, counts):
+        if counts[2] == 0:
+            return self.weights[counts[1]]
+        if counts[1] == 0:
+            return -self.weights[counts[2]]
+        return 0
+
+    def make(self, cell, side):
+        """
+        Places a mark and returns True if it completes k in a row.
+        """
+        self.cells[cell] = side
+        self.empty -= 1
+        for neighbor in self.neighbors[cell]:
+            self.near[neighbor] += 1
+        won = False
+        for line in self.cell_lines[cell]:
+            counts = self.counts[line]
+            self.score -= self.line_value(counts)
+            counts[side] += 1
+            self.score += self.line_value(counts)
+            if counts[side] == self.k:
+                won = True
+        return won
+
+    def unmake(self, cell, side):
+        self.cells[cell] = 0
+        self.empty += 1
+        for neighbor in self.neighbors[cell]:
+            self.near[neighbor] -= 1
+        for line in self.cell_lines[cell]:
+            counts = self.counts[line]
+            self.score -= self.line_value(counts)
+            counts[side] -= 1
+            self.score += self.line_value(counts)
+
+    def candidates(self):
+        """
+        Returns the empty cells worth trying, best history first.
+        """
+        cells = self.cells
+        near = self.near
+        moves = [cell for cell in range(self.size)
+                 if cells[cell] == 0 and near[cell]]
+        if not moves:
+            moves = [cell for cell in range(self.size) if cells[cell] == 0]
+            if len(moves) == self.size:
+                return [self.size // 2]
+        moves.sort(key=self.history.__getitem__, reverse=True)
+        return moves
+
+    def root(self, depth, side, first=None):
+        """
+        Searches every root move to `depth` and returns the best move and
+        its score for `side`. `first`, the best move of the previous
+        depth, is searched first.
+        """
+        moves = self.candidates()
+        if first is not None:
+            moves.remove(first)
+            moves.insert(0, first)
+        alpha = -WIN_SCORE - 1
+        best = moves[0]
+        for cell in moves:
+            score = self.move_score(cell, side, depth, alpha, WIN_SCORE + 1, 0)
+            if score > alpha:
+                alpha = score
+                best = cell
+        return best, alpha
+
+    def move_score(self, cell, side, depth, alpha, beta, ply):
+        """
+        Returns the negamax score for `side` of playing `cell`.
+        """
+        won = self.make(cell, side)
+        try:
+            if won:
+                return WIN_SCORE - ply
+            if self.empty == 0:
+                return 0
+            return -self.negamax(3 - side, depth - 1, -beta, -alpha, ply + 1)
+        finally:
+            self.unmake(cell, side)
+
+    def negamax(self, side, depth, alpha, beta, ply):
+        """
+        Returns the score of the position for `side` to move.
+        """
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+        if depth == 0:
+            return self.score if side == 1 else -self.score
+
+        best = -WIN_SCORE - 1
+        for cell in self.candidates():
+            score = self.move_score(cell, side, depth, alpha, beta, ply)
+            if score > best:
+                best = score
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                self.history[cell] += depth * depth
+                break
+        return best
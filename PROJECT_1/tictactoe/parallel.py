@@ -0,0 +1,185 @@
+"""
+Root-parallel search across a pool of processes.
+
+The root moves of a search are handed out to a pool of worker processes
+in the order the serial search tries them. The best score found so far
+is shared between the workers through a multiprocessing.Value, and each
+worker searches its move with a window just below it, so a move that
+cannot tie the best is cut off early while one that can is scored
+exactly. The parent then picks the first move with the best score, the
+same action as the serial search.
+
+parallel_minimax does this for the 3x3 game with the alpha-beta search
+of tictactoe, and parallel_root for an mnk.MNKGame searched to a fixed
+depth, where the search is expensive.
+"""
+
+import math
+import multiprocessing
+import os
+
+import mnk
+import tictactoe as ttt
+
+# Pool of worker processes, its size, and the best score shared with it
+pool = None
+pool_processes = None
+shared_best = None
+
+
+def init_worker(best):
+    """
+    Runs in each worker process, keeping the shared best score.
+    """
+    global shared_best
+    shared_best = best
+
+
+def get_pool(processes=None):
+    """
+    Returns the worker pool, starting it or restarting it with
+    `processes` workers (the number of CPUs if None) as needed.
+    """
+    global pool, pool_processes, shared_best
+    processes = processes or os.cpu_count() or 1
+    if pool is None or pool_processes != processes:
+        close()
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+        shared_best = context.Value("q", 0)
+        pool = context.Pool(processes, init_worker, (shared_best,))
+        pool_processes = processes
+    return pool
+
+
+def close():
+    """
+    Stops the worker pool, if any.
+    """
+    global pool, pool_processes
+    if pool is not None:
+        pool.terminate()
+        pool.join()
+        pool = None
+        pool_processes = None
+
+
+def raise_best(score):
+    """
+    Raises the shared best score to `score` if it is higher.
+    """
+    with shared_best.get_lock():
+        if score > shared_best.value:
+            shared_best.value = score
+
+
+def search_moves(function, tasks, processes, worst):
+    """
+    Starts the shared best at `worst`, runs `function` on each task in
+    the pool and returns the (score, nodes) of each task in order.
+    """
+    workers = get_pool(processes)
+    shared_best.value = worst
+    return workers.map(function, tasks, chunksize=1)
+
+
+def first_best(moves, scores):
+    """
+    Returns the first move with the highest score.
+    """
+    best = max(scores)
+    return moves[scores.index(best)]
+
+# The 3x3 game
+
+
+def ttt_move_score(task):
+    """
+    Returns the score, for the player to move, of one root move of a
+    flat board, and the nodes searched. The score is exact if it is at
+    least the shared best score, and otherwise only an upper bound.
+    """
+    cells, i, turn = task
+    other = ttt.O if turn == ttt.X else ttt.X
+    child = cells[:i] + (turn,) + cells[i + 1:]
+
+    # Values are integers, so a window one below the best scores ties exactly
+    best = shared_best.value
+    if turn == ttt.X:
+        alpha, beta = best - 1, 2
+    else:
+        alpha, beta = -2, 1 - best
+    counts = {"nodes": 0}
+    value = ttt.alphabeta_value(child, other, alpha, beta, [None] * 10, 1, counts)
+    score = value if turn == ttt.X else -value
+    raise_best(score)
+    return score, counts["nodes"]
+
+
+def parallel_minimax(board, stats=None, processes=None):
+    """
+    Returns the same action as full_minimax, searching the root moves
+    with alpha-beta across `processes` worker processes.
+    """
+    if ttt.terminal(board):
+        if stats is not None:
+            stats["nodes"] = 1
+        return None
+    turn = ttt.player(board)
+    cells = ttt.flatten(board)
+    moves = list(ttt.actions(board))
+    tasks = [(cells, i * 3 + j, turn) for i, j in moves]
+    results = search_moves(ttt_move_score, tasks, processes, -2)
+    if stats is not None:
+        stats["nodes"] = 1 + sum(nodes for _, nodes in results)
+    return first_best(moves, [score for score, _ in results])
+
+# m,n,k games
+
+
+# The root position a worker last searched, and its Search, kept so the
+# history heuristic carries over between root moves as in a serial search
+worker_root = None
+worker_search = None
+
+
+def mnk_move_score(task):
+    """
+    Returns the negamax score of one root move of an m,n,k game searched
+    to `depth`, and the nodes searched. The score is exact if it is at
+    least the shared best score, and otherwise only an upper bound.
+    """
+    global worker_root, worker_search
+    game, board, cell, side, depth = task
+    root = (game.m, game.n, game.k, tuple(map(tuple, board)))
+    if root != worker_root:
+        worker_root = root
+        worker_search = mnk.Search(game, board, math.inf)
+    search = worker_search
+    nodes = search.nodes
+    alpha = shared_best.value - 1
+    score = search.move_score(cell, side, depth, alpha, mnk.WIN_SCORE + 1, 0)
+    raise_best(score)
+    return score, search.nodes - nodes
+
+
+def parallel_root(game, board, depth, processes=None, stats=None):
+    """
+    Returns the action that mnk.Search(game, board, ...).root(depth, side)
+    picks, searching the root moves across `processes` worker processes,
+    or None on a terminal board. If `stats` is a dict, it gets the nodes
+    searched and the score of the action.
+    """
+    if game.terminal(board):
+        return None
+    side = 1 if game.player(board) == mnk.X else 2
+    moves = mnk.Search(game, board, math.inf).candidates()
+    tasks = [(game, board, cell, side, depth) for cell in moves]
+    results = search_moves(mnk_move_score, tasks, processes, -mnk.WIN_SCORE - 1)
+    scores = [score for score, _ in results]
+    if stats is not None:
+        stats["nodes"] = sum(nodes for _, nodes in results)
+        stats["score"] = max(scores)
+    return divmod(first_best(moves, scores), game.n)
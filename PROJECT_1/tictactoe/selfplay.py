@@ -0,0 +1,171 @@
+"""
+Headless self-play tournaments for the tictactoe engines.
+
+Usage: python selfplay.py [--games N] [-x PLAYER] [-o PLAYER]
+                          [--openings N] [--seed N] [--processes N]
+                          [--output FILE]
+
+Plays games from the initial state between two players, each one of
+the minimax engines (tictactoe.ENGINES) or "random", and writes a JSON
+summary with sorted keys: the results, and for each player the moves
+played, nodes searched and move latency percentiles. `--openings` plays
+that many random moves before the players take over, so engine games
+differ. Game N always uses seed + N and starts with an empty
+transposition table, so the results, nodes and the digest of the moves
+played are the same for any number of processes, and a change in them
+points to a change in result, winner or minimax. The "book" engine
+searches no nodes for the positions in its opening book, so the config
+records whether tictactoe loaded one, and only runs that agree on it
+can be compared.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+import tictactoe as ttt
+
+# Player that picks a uniformly random action
+RANDOM = "random"
+
+# Percentiles of move latency in the summary
+PERCENTILES = (50, 90, 99, 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play tictactoe engines against each other.")
+    players = sorted(ttt.ENGINES) + [RANDOM]
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("-x", default=ttt.DEFAULT_ENGINE, choices=players)
+    parser.add_argument("-o", default=RANDOM, choices=players)
+    parser.add_argument("--openings", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    if args.games < 1 or args.processes < 1 or args.openings < 0:
+        parser.error("--games and --processes must be positive, "
+                     "--openings not negative")
+
+    summary = tournament(args.x, args.o, args.games, args.openings,
+                         args.seed, args.processes)
+    text = dumps(summary)
+    if args.output is None:
+        sys.stdout.write(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+def play_game(x_player, o_player, seed=0, openings=0):
+    """
+    Plays one game and returns its record: the actions played, the
+    winner (None for a tie), and for each player the nodes searched
+    and the seconds taken by each of its moves. The first `openings`
+    moves are random and not counted.
+    """
+    rng = random.Random(seed)
+    ttt.transposition.clear()
+    players = {ttt.X: x_player, ttt.O: o_player}
+    record = {"actions": [], "nodes": {ttt.X: 0, ttt.O: 0},
+              "seconds": {ttt.X: [], ttt.O: []}}
+
+    board = ttt.initial_state()
+    while not ttt.terminal(board):
+        turn = ttt.player(board)
+        if len(record["actions"]) < openings or players[turn] == RANDOM:
+            action = rng.choice(sorted(ttt.actions(board)))
+        else:
+            stats = {}
+            start = time.perf_counter()
+            action = ttt.minimax(board, players[turn], stats)
+            record["seconds"][turn].append(time.perf_counter() - start)
+            record["nodes"][turn] += stats["nodes"]
+        record["actions"].append(action)
+        board = ttt.result(board, action)
+
+    record["winner"] = ttt.winner(board)
+    return record
+
+
+def play_seeded(args):
+    """
+    play_game for pool.imap, which passes one argument.
+    """
+    return play_game(*args)
+
+
+def tournament(x_player, o_player, games, openings=0, seed=0, processes=1):
+    """
+    Plays `games` games, across a pool of `processes` if more than one,
+    and returns their summary.
+    """
+    jobs = [(x_player, o_player, seed + i, openings) for i in range(games)]
+    start = time.perf_counter()
+    if processes > 1:
+        with multiprocessing.Pool(processes) as pool:
+            records = list(pool.imap(play_seeded, jobs))
+    else:
+        records = [play_seeded(job) for job in jobs]
+    seconds = time.perf_counter() - start
+    summary = summarize(records, x_player, o_player)
+    summary["config"] = {"games": games, "openings": openings, "seed": seed,
+                         "processes": processes,
+                         "book": ttt.opening_book is not None}
+    summary["wall_seconds"] = round(seconds, 6)
+    return summary
+
+
+def summarize(records, x_player, o_player):
+    """
+    Returns the results, per-player statistics and move digest of a
+    list of game records.
+    """
+    results = {"x_wins": 0, "o_wins": 0, "ties": 0}
+    digest = hashlib.sha256()
+    for record in records:
+        if record["winner"] == ttt.X:
+            results["x_wins"] += 1
+        elif record["winner"] == ttt.O:
+            results["o_wins"] += 1
+        else:
+            results["ties"] += 1
+        digest.update("".join(f"{i}{j}" for i, j in record["actions"]).encode())
+        digest.update(b";")
+
+    players = {}
+    for mark, name in ((ttt.X, x_player), (ttt.O, o_player)):
+        seconds = sorted(s for record in records for s in record["seconds"][mark])
+        players[mark] = {
+            "player": name,
+            "moves": len(seconds),
+            "nodes": sum(record["nodes"][mark] for record in records),
+            "latency_ms": {f"p{p}": round(percentile(seconds, p) * 1000, 6)
+                           for p in PERCENTILES} if seconds else None,
+        }
+
+    return {"results": results, "players": players,
+            "moves_digest": digest.hexdigest()}
+
+
+def percentile(values, p):
+    """
+    Returns the nearest-rank `p`th percentile of sorted `values`.
+    """
+    rank = max(1, -(-len(values) * p // 100))
+    return values[rank - 1]
+
+
+def dumps(summary):
+    """
+    Returns a summary as JSON text with sorted keys, one line per field.
+    """
+    return json.dumps(summary, indent=2, sort_keys=True) + "\n"
+
+
+if __name__ == "__main__":
+    main()
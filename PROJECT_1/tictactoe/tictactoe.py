@@ -5,6 +5,9 @@ Tic Tac Toe Player
 import math    
 import copy
 
+import bitboard
+import book
+
 X = "X"
 O = "O"
 EMPTY = None
@@ -114,11 +117,29 @@ def utility(board):
 # Main algorithm for the AI choice
 
 
-def minimax(board):
+def minimax(board, engine=None, stats=None):
     """
     Returns the optimal action for the current player on the board.
+
+    `engine` names one of ENGINES (DEFAULT_ENGINE if None). Every engine
+    returns the same action as full_minimax. If `stats` is a dict, the
+    number of nodes searched is stored in it under "nodes".
+    """
+    return ENGINES[engine or DEFAULT_ENGINE](board, stats)
+
+# Plain minimax over the full game tree
+
+
+def full_minimax(board, stats=None):
     """
+    Returns the optimal action by searching the whole game tree below
+    the board.
+    """
+    nodes = 0
+
     def max_value(board):
+        nonlocal nodes
+        nodes += 1
         
         if terminal(board):
             return utility(board), EMPTY
@@ -132,6 +153,8 @@ def minimax(board):
         return optm, optm_action
     
     def min_value(board):
+        nonlocal nodes
+        nodes += 1
         
         if terminal(board):
             return utility(board), EMPTY
@@ -146,10 +169,268 @@ def minimax(board):
     
     player_state = player(board)
     
+    if terminal(board):
+        action = None
+    elif player_state == X:
+        action = max_value(board)[1]
+    else:
+        action = min_value(board)[1]
+
+    if stats is not None:
+        stats["nodes"] = nodes
+    return action
+
+# Flat board helpers: the cells of a board as a tuple in row-major order
+
+
+# The eight lines of three cells, as flat indices
+LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8),
+         (0, 3, 6), (1, 4, 7), (2, 5, 8),
+         (0, 4, 8), (2, 4, 6))
+
+# The eight symmetries of the board (rotations and reflections), each as
+# the flat index that every flat index is taken from
+SYMMETRIES = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),
+)
+
+# Digit of each cell value in the base-3 board encoding
+DIGITS = {EMPTY: 0, X: 1, O: 2}
+
+
+def flatten(board):
+    """
+    Returns the cells of a board as a tuple, in row-major order.
+    """
+    return tuple(cell for row in board for cell in row)
+
+
+def flat_winner(cells):
+    """
+    Returns the winner of a flat board, if there is one.
+    """
+    for a, b, c in LINES:
+        if cells[a] is not EMPTY and cells[a] == cells[b] == cells[c]:
+            return cells[a]
+    return None
+
+
+def encode(cells):
+    """
+    Returns the base-3 number of a flat board, with cell 0 as the
+    least significant digit.
+    """
+    key = 0
+    for cell in reversed(cells):
+        key = key * 3 + DIGITS[cell]
+    return key
+
+
+def canonical(cells):
+    """
+    Returns the smallest encoding of a flat board under the eight
+    symmetries, the same for every board equivalent to it.
+    """
+    return min(encode([cells[i] for i in symmetry]) for symmetry in SYMMETRIES)
+
+# Minimax with a transposition table
+
+
+# Maps the canonical encoding of every position solved so far to its value
+transposition = {}
+
+
+def table_value(cells, turn, stats=None):
+    """
+    Returns the minimax value of a flat board with `turn` to move,
+    looking it up in the transposition table or solving and storing it.
+    """
+    key = canonical(cells)
+    value = transposition.get(key)
+    if value is not None:
+        return value
+    if stats is not None:
+        stats["nodes"] = stats.get("nodes", 0) + 1
+
+    win = flat_winner(cells)
+    if win is not None:
+        value = 1 if win == X else -1
+    elif EMPTY not in cells:
+        value = 0
+    else:
+        other = O if turn == X else X
+        values = [table_value(cells[:i] + (turn,) + cells[i + 1:], other, stats)
+                  for i in range(9) if cells[i] is EMPTY]
+        value = max(values) if turn == X else min(values)
+    transposition[key] = value
+    return value
+
+
+def table_minimax(board, stats=None):
+    """
+    Returns the optimal action using the transposition table, which
+    keeps the value of every position solved by earlier calls.
+    """
+    if stats is not None:
+        stats["nodes"] = 0
     if terminal(board):
         return None
-    
-    if player_state == X:
-        return max_value(board)[1]
-    elif player_state == O:
-        return min_value(board)[1]
\ No newline at end of file
+    turn = player(board)
+    other = O if turn == X else X
+    cells = flatten(board)
+
+    # The first best action in actions() order, as full_minimax picks it
+    best = None
+    for action in actions(board):
+        i = action[0] * 3 + action[1]
+        value = table_value(cells[:i] + (turn,) + cells[i + 1:], other, stats)
+        if best is None or (value > best_value if turn == X else value < best_value):
+            best, best_value = action, value
+    return best
+
+# Alpha-beta pruning with move ordering
+
+
+# Flat indices in the order moves are tried: centre, corners, edges
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+
+def alphabeta_value(cells, turn, alpha, beta, killers, depth, stats):
+    """
+    Returns the minimax value of a flat board with `turn` to move, or a
+    bound on it outside (alpha, beta). `killers[depth]` is the last move
+    that caused a cutoff at this depth, and is tried first.
+    """
+    stats["nodes"] += 1
+    win = flat_winner(cells)
+    if win is not None:
+        return 1 if win == X else -1
+    if EMPTY not in cells:
+        return 0
+
+    other = O if turn == X else X
+    killer = killers[depth]
+    order = MOVE_ORDER
+    if killer is not None and cells[killer] is EMPTY:
+        order = (killer,) + tuple(i for i in MOVE_ORDER if i != killer)
+
+    value = -2 if turn == X else 2
+    for i in order:
+        if cells[i] is not EMPTY:
+            continue
+        child = alphabeta_value(cells[:i] + (turn,) + cells[i + 1:], other,
+                                alpha, beta, killers, depth + 1, stats)
+        if turn == X:
+            value = max(value, child)
+            alpha = max(alpha, value)
+        else:
+            value = min(value, child)
+            beta = min(beta, value)
+        if alpha >= beta:
+            killers[depth] = i
+            break
+    return value
+
+
+def alphabeta_minimax(board, stats=None):
+    """
+    Returns the optimal action using alpha-beta pruning, trying the
+    centre, then corners, then edges, and killer moves first.
+    """
+    counts = {"nodes": 1}
+    if terminal(board):
+        action = None
+    else:
+        turn = player(board)
+        other = O if turn == X else X
+        cells = flatten(board)
+        killers = [None] * 10
+
+        # Root moves are searched in actions() order and a move replaces
+        # the best only if strictly better, as full_minimax does, so a
+        # child that cannot beat the best so far only needs a bound
+        action = None
+        for k in actions(board):
+            i = k[0] * 3 + k[1]
+            child = cells[:i] + (turn,) + cells[i + 1:]
+            if action is None:
+                alpha, beta = -2, 2
+            elif turn == X:
+                alpha, beta = best, 2
+            else:
+                alpha, beta = -2, best
+            value = alphabeta_value(child, other, alpha, beta, killers, 1, counts)
+            if action is None or (value > best if turn == X else value < best):
+                action, best = k, value
+
+            # No later move can be strictly better than a win
+            if best == (1 if turn == X else -1):
+                break
+
+    if stats is not None:
+        stats["nodes"] = counts["nodes"]
+    return action
+
+# Plain minimax on bitboards
+
+
+def bitboard_minimax(board, stats=None):
+    """
+    Returns the optimal action by searching the whole game tree, like
+    full_minimax, on bitboard states instead of lists of lists.
+    """
+    counts = {"nodes": 1}
+    action = None
+    if not terminal(board):
+        x, o = bitboard.from_board(board)
+        x_to_move = player(board) == X
+        for k in actions(board):
+            move = bitboard.to_move(k)
+            if x_to_move:
+                value = bitboard.value(x | move, o, False, counts)
+            else:
+                value = bitboard.value(x, o | move, True, counts)
+            if action is None or (value > best if x_to_move else value < best):
+                action, best = k, value
+
+    if stats is not None:
+        stats["nodes"] = counts["nodes"]
+    return action
+
+# Lookup in the opening book
+
+
+# Book table built by book.py, loaded once, or None if there is no book file
+opening_book = book.load()
+
+
+def book_minimax(board, stats=None):
+    """
+    Returns the optimal action from the opening book in O(1), or from
+    table_minimax if there is no book or the board is not in it.
+    """
+    if opening_book is not None:
+        entry = book.lookup(opening_book, encode(flatten(board)))
+        if entry is not None:
+            if stats is not None:
+                stats["nodes"] = 0
+            return entry[0]
+    return table_minimax(board, stats)
+
+
+# Engines that minimax can use, by name
+ENGINES = {
+    "full": full_minimax,
+    "table": table_minimax,
+    "alphabeta": alphabeta_minimax,
+    "bitboard": bitboard_minimax,
+    "book": book_minimax,
+}
+DEFAULT_ENGINE = "book"
@@ -0,0 +1,136 @@
+"""
+Background computation of the computer's moves.
+
+A MoveWorker runs a move function, such as tictactoe.minimax, away from
+the pygame loop of runner.py, so the loop keeps drawing frames and
+handling events while the computer thinks. The loop starts a search,
+polls it once per frame, and cancels it when the game is reset.
+
+Where processes can be forked, the search runs in a child process, which
+neither competes with the loop for the GIL nor outlives a cancel. Other
+platforms start child processes by re-running the main script, which
+runner.py cannot survive, so there the search runs on a daemon thread.
+"""
+
+import multiprocessing
+import threading
+import time
+
+# Whether searches can run in forked child processes
+FORK = "fork" in multiprocessing.get_all_start_methods()
+
+
+class MoveWorker():
+    """
+    Computes one move at a time with `function(board)`, in a child
+    process if `process` (by default where fork is available), where
+    `function` must be picklable, or else on a thread. A cancelled
+    search is killed in a process, and on a thread runs to its end and
+    its move is thrown away.
+    """
+
+    def __init__(self, function, process=FORK):
+        self.function = function
+        self.process = process
+        self.pool = None
+        self.search = None
+        self.started = None
+
+    def start(self, board):
+        """
+        Cancels any running search and starts one for `board`.
+        """
+        self.cancel()
+        board = [row[:] for row in board]
+        if self.process:
+            if self.pool is None:
+                self.pool = multiprocessing.get_context("fork").Pool(1)
+            self.search = self.pool.apply_async(self.function, (board,))
+        else:
+            self.search = ThreadSearch(self.function, board)
+        self.started = time.perf_counter()
+
+    def busy(self):
+        """
+        Returns True if a search was started and its move not yet taken.
+        """
+        return self.search is not None
+
+    def elapsed(self):
+        """
+        Returns the seconds since the current search started, or 0.
+        """
+        if self.search is None:
+            return 0
+        return time.perf_counter() - self.started
+
+    def poll(self):
+        """
+        Returns (True, move) once the current search has finished, and
+        forgets it, or (False, None) while it is running or if there is
+        none. Re-raises an exception raised by the move function.
+        """
+        search = self.search
+        if search is None or not search.ready():
+            return False, None
+        self.search = None
+        return True, search.get()
+
+    def cancel(self):
+        """
+        Abandons the current search, if any.
+        """
+        search = self.search
+        self.search = None
+        if search is None or search.ready():
+            return
+        if self.process:
+            self.close()
+        else:
+            search.cancelled.set()
+
+    def close(self):
+        """
+        Stops the child process, if any. A later start forks a new one.
+        """
+        self.search = None
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+
+class ThreadSearch():
+    """
+    One move search on a daemon thread, with the ready() and get() of
+    the AsyncResult a process pool returns.
+    """
+
+    def __init__(self, function, board):
+        self.function = function
+        self.board = board
+        self.move = None
+        self.error = None
+        self.done = threading.Event()
+        self.cancelled = threading.Event()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        try:
+            if not self.cancelled.is_set():
+                self.move = self.function(self.board)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+    def ready(self):
+        return self.done.is_set()
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+
+    def get(self):
+        if self.error is not None:
+            raise self.error
+        return self.move
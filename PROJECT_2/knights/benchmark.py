@@ -0,0 +1,141 @@
+"""
+Benchmarks for the model checkers.
+
+Usage: python benchmark.py puzzles|scaling|sat
+"""
+
+import random
+import sys
+import time
+
+import check
+import puzzle
+import sat
+from logic import (And, Implication, Not, Or, Symbol, model_check,
+                   model_check_enumerate)
+
+# Times the puzzles are solved, and the symbol counts of the scaling
+# benchmark, with the largest the enumerating checker is run on
+PUZZLE_REPEATS = 20
+SCALING_SYMBOLS = (6, 10, 14, 18, 20, 24, 28)
+ENUMERATE_LIMIT = 20
+
+
+def solve_puzzles(checker):
+    """
+    Runs every query of puzzle.py with `checker` and returns the answers.
+    """
+    symbols = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+               puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+    return [checker(knowledge, symbol)
+            for knowledge in (puzzle.knowledge0, puzzle.knowledge1,
+                              puzzle.knowledge2, puzzle.knowledge3)
+            for symbol in symbols]
+
+
+def bench_puzzles():
+    """
+    Compares the time to solve the puzzles of puzzle.py.
+    """
+    answers = None
+    for name, checker in (("enumerate", model_check_enumerate),
+                          ("compiled", model_check), ("sat", sat.entails)):
+        start = time.perf_counter()
+        for _ in range(PUZZLE_REPEATS):
+            result = solve_puzzles(checker)
+        seconds = (time.perf_counter() - start) / PUZZLE_REPEATS
+        assert answers is None or result == answers
+        answers = result
+        print(f"{name:>9}: {seconds * 1000:.3f}ms per run of puzzle.py")
+
+
+def knights(count):
+    """
+    Returns a knights and knaves knowledge base over `count` symbols,
+    with person i saying person i + 1 is a knave, and the query that
+    the last person is a knight or a knave, which every model checker
+    must confirm on all of the models.
+    """
+    people = count // 2
+    knight = [Symbol(f"{i} is a Knight") for i in range(people)]
+    knave = [Symbol(f"{i} is a Knave") for i in range(people)]
+    knowledge = And()
+    for i in range(people):
+        knowledge.add(Or(knight[i], knave[i]))
+        knowledge.add(Not(And(knight[i], knave[i])))
+        if i + 1 < people:
+            knowledge.add(Implication(knight[i], knave[i + 1]))
+            knowledge.add(Implication(knave[i], Not(knave[i + 1])))
+    return knowledge, Or(knight[-1], knave[-1])
+
+
+def bench_scaling():
+    """
+    Compares the time to check an entailed query as the number of
+    symbols grows.
+    """
+    for count in SCALING_SYMBOLS:
+        knowledge, query = knights(count)
+        line = f"{count:2d} symbols:"
+        for name, checker in (("enumerate", model_check_enumerate),
+                              ("compiled", model_check), ("sat", sat.entails)):
+            if checker is model_check_enumerate and count > ENUMERATE_LIMIT:
+                continue
+            start = time.perf_counter()
+            assert checker(knowledge, query)
+            line += f" {name} {(time.perf_counter() - start) * 1000:10.3f}ms"
+        print(line)
+
+
+# Symbol counts of the knights knowledge bases and random 3-SAT
+# sentences given to the SAT solver, and pigeonhole sizes
+SAT_KNIGHTS = (100, 400, 1000)
+SAT_RANDOM = (50, 100, 150, 200)
+SAT_PIGEONHOLE = (5, 6, 7)
+
+
+def bench_sat():
+    """
+    Reports the time and search statistics of sat on knowledge bases
+    and sentences with hundreds of symbols.
+    """
+    def run(label, solve):
+        stats = {}
+        start = time.perf_counter()
+        answer = solve(stats)
+        seconds = time.perf_counter() - start
+        print(f"{label}: {answer}, {seconds * 1000:9.1f}ms, "
+              f"{stats['variables']} variables, {stats['clauses']} clauses, "
+              f"{stats['decisions']} decisions, {stats['conflicts']} conflicts")
+
+    for count in SAT_KNIGHTS:
+        knowledge, query = knights(count)
+        run(f"knights {count:4d} symbols, entailed",
+            lambda stats: sat.entails(knowledge, query, stats))
+    for count in SAT_RANDOM:
+        symbols = [Symbol(f"P{i}") for i in range(count)]
+        for seed in range(3):
+            sentence = check.random_clauses(random.Random(seed), symbols, 4.26)
+            run(f"3-SAT {count:3d} symbols, seed {seed}, satisfiable",
+                lambda stats: sat.satisfiable(sentence, stats) is not None)
+    for holes in SAT_PIGEONHOLE:
+        run(f"pigeonhole {holes}, satisfiable",
+            lambda stats: sat.satisfiable(check.pigeonhole(holes), stats) is not None)
+
+
+# Benchmarks that can be selected from the command line
+BENCHMARKS = {
+    "puzzles": bench_puzzles,
+    "scaling": bench_scaling,
+    "sat": bench_sat,
+}
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in BENCHMARKS:
+        sys.exit(f"Usage: python benchmark.py {'|'.join(BENCHMARKS)}")
+    BENCHMARKS[sys.argv[1]]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Consistency checks for the model checkers.
+
+Usage: python check.py
+
+Checks that the compiled model_check agrees with the enumerating
+model_check_enumerate on the puzzles and on random sentences, in one
+block of models and split into several, that the SAT-based
+sat.entails agrees with them and its models satisfy their sentences,
+and exits with an error on the first mismatch.
+"""
+
+import random
+
+import puzzle
+import sat
+from logic import (And, Program, Biconditional, Implication, Not, Or, Symbol,
+                   model_check, model_check_enumerate)
+
+# Random sentences checked, and the most symbols in one
+RANDOM_CHECKS = 500
+MAX_SYMBOLS = 8
+
+
+def random_sentence(rng, symbols, depth):
+    """
+    Returns a random sentence over `symbols` at most `depth` deep.
+    """
+    if depth == 0 or rng.random() < 0.25:
+        return rng.choice(symbols)
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(random_sentence(rng, symbols, depth - 1))
+    if kind == 1:
+        return And(*(random_sentence(rng, symbols, depth - 1)
+                     for _ in range(rng.randint(0, 3))))
+    if kind == 2:
+        return Or(*(random_sentence(rng, symbols, depth - 1)
+                    for _ in range(rng.randint(0, 3))))
+    left = random_sentence(rng, symbols, depth - 1)
+    right = random_sentence(rng, symbols, depth - 1)
+    return Implication(left, right) if kind == 3 else Biconditional(left, right)
+
+
+def random_clauses(rng, symbols, ratio):
+    """
+    Returns a random 3-SAT sentence with `ratio` clauses per symbol.
+    """
+    return And(*(Or(*(symbol if rng.random() < 0.5 else Not(symbol)
+                      for symbol in rng.sample(symbols, 3)))
+                 for _ in range(int(len(symbols) * ratio))))
+
+
+def pigeonhole(holes):
+    """
+    Returns the unsatisfiable sentence that holes + 1 pigeons each sit
+    in one of `holes` holes, no two in the same hole.
+    """
+    sits = [[Symbol(f"pigeon {i} in hole {j}") for j in range(holes)]
+            for i in range(holes + 1)]
+    sentence = And(*(Or(*row) for row in sits))
+    for j in range(holes):
+        for a in range(holes + 1):
+            for b in range(a + 1, holes + 1):
+                sentence.add(Not(And(sits[a][j], sits[b][j])))
+    return sentence
+
+
+def check_sat():
+    """
+    Checks sat against model_check on random 3-SAT sentences near the
+    satisfiability threshold, and on larger sentences that a model
+    found satisfies the sentence or the sentence is known unsatisfiable.
+    """
+    rng = random.Random(0)
+    symbols = [Symbol(f"P{i}") for i in range(12)]
+    falsity = And(symbols[0], Not(symbols[0]))
+    for _ in range(100):
+        sentence = random_clauses(rng, symbols, 4.26)
+        unsatisfiable = model_check(sentence, falsity)
+        assert (sat.satisfiable(sentence) is None) == unsatisfiable, sentence
+
+    symbols = [Symbol(f"P{i}") for i in range(150)]
+    for _ in range(3):
+        sentence = random_clauses(rng, symbols, 4.26)
+        model = sat.satisfiable(sentence)
+        if model is not None:
+            assert sentence.evaluate(model)
+    assert sat.satisfiable(pigeonhole(6)) is None
+
+
+def check_puzzles():
+    symbols = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+               puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+    for knowledge in (puzzle.knowledge0, puzzle.knowledge1,
+                      puzzle.knowledge2, puzzle.knowledge3):
+        for symbol in symbols:
+            for query in (symbol, Not(symbol)):
+                expected = model_check_enumerate(knowledge, query)
+                assert model_check(knowledge, query) == expected, query
+                assert sat.entails(knowledge, query) == expected, query
+
+
+def check_random():
+    rng = random.Random(0)
+    entailed = 0
+    for _ in range(RANDOM_CHECKS):
+        symbols = [Symbol(f"P{i}") for i in range(rng.randint(1, MAX_SYMBOLS))]
+        knowledge = And(*(random_sentence(rng, symbols, 3)
+                          for _ in range(rng.randint(1, 4))))
+        query = random_sentence(rng, symbols, 2)
+        try:
+            expected = model_check_enumerate(knowledge, query)
+        except TypeError:
+            # Both take set.union of no symbol sets, as for an empty And
+            try:
+                model_check(knowledge, query)
+            except TypeError:
+                continue
+            raise AssertionError(f"no TypeError for {knowledge}")
+        assert model_check(knowledge, query) == expected, (knowledge, query)
+        assert sat.entails(knowledge, query) == expected, (knowledge, query)
+        entailed += expected
+
+        # A model found by the solver satisfies the knowledge
+        model = sat.satisfiable(knowledge)
+        if model is not None:
+            assert knowledge.evaluate({symbol.name: model.get(symbol.name, False)
+                                       for symbol in symbols}), knowledge
+    return entailed
+
+
+def main():
+    check_puzzles()
+    print("puzzles agree")
+    entailed = check_random()
+    print(f"{RANDOM_CHECKS} random sentences agree ({entailed} entailed)")
+
+    # Small blocks, so most sentences span several blocks of models
+    block_bits = Program.BLOCK_BITS
+    Program.BLOCK_BITS = 3
+    try:
+        check_random()
+    finally:
+        Program.BLOCK_BITS = block_bits
+    print("and agree when split into blocks of 8 models")
+    check_sat()
+    print("SAT solver agrees on random 3-SAT and refutes pigeonhole")
+
+
+if __name__ == "__main__":
+    main()
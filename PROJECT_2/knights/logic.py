@@ -15,6 +15,11 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def compile(self, program):
+        """Adds instructions computing the sentence to a Program, and
+        returns the register holding its value."""
+        raise Exception("nothing to compile")
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -68,6 +73,9 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def compile(self, program):
+        return program.emit("symbol", program.index[self.name])
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -92,6 +100,9 @@ class Not(Sentence):
     def symbols(self):
         return self.operand.symbols()
 
+    def compile(self, program):
+        return program.emit("not", self.operand.compile(program))
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -129,6 +140,10 @@ class And(Sentence):
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def compile(self, program):
+        return program.emit("and", *sorted({conjunct.compile(program)
+                                           for conjunct in self.conjuncts}))
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -160,6 +175,10 @@ class Or(Sentence):
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def compile(self, program):
+        return program.emit("or", *sorted({disjunct.compile(program)
+                                          for disjunct in self.disjuncts}))
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -191,6 +210,10 @@ class Implication(Sentence):
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def compile(self, program):
+        return program.emit("implies", self.antecedent.compile(program),
+                            self.consequent.compile(program))
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -224,9 +247,108 @@ class Biconditional(Sentence):
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
+    def compile(self, program):
+        return program.emit("iff", self.left.compile(program),
+                            self.right.compile(program))
+
+
+class Program():
+    """
+    Sentences compiled to a flat list of instructions over integer
+    symbol indices. Each instruction computes one register from symbols
+    or earlier registers, and identical instructions share a register.
+    The program is run on blocks of models at once: a register holds one
+    bit per model of the block, set where its sentence is true.
+    """
+
+    # log2 of the number of models evaluated at once
+    BLOCK_BITS = 16
+
+    def __init__(self, symbols):
+        self.symbols = sorted(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.instructions = []
+        self.registers = {}
+
+    def emit(self, op, *args):
+        """Adds an instruction unless an identical one exists, and
+        returns its register."""
+        instruction = (op, *args)
+        register = self.registers.get(instruction)
+        if register is None:
+            register = len(self.instructions)
+            self.instructions.append(instruction)
+            self.registers[instruction] = register
+        return register
+
+    def blocks(self):
+        """Yields, for each block of models, the list of the values of
+        every instruction on the block."""
+        count = len(self.symbols)
+        block_bits = min(count, self.BLOCK_BITS)
+        size = 1 << block_bits
+        full = (1 << size) - 1
+
+        # Bit m of pattern i is bit i of model m within the block
+        patterns = []
+        for i in range(block_bits):
+            run = (1 << (1 << i)) - 1
+            period = run << (1 << i)
+            pattern = period
+            width = 2 << i
+            while width < size:
+                pattern |= pattern << width
+                width *= 2
+            patterns.append(pattern)
+
+        for block in range(1 << (count - block_bits)):
+            registers = []
+            for op, *args in self.instructions:
+                if op == "symbol":
+                    i = args[0]
+                    if i < block_bits:
+                        value = patterns[i]
+                    else:
+                        value = full if block >> (i - block_bits) & 1 else 0
+                elif op == "not":
+                    value = full ^ registers[args[0]]
+                elif op == "and":
+                    value = full
+                    for arg in args:
+                        value &= registers[arg]
+                elif op == "or":
+                    value = 0
+                    for arg in args:
+                        value |= registers[arg]
+                elif op == "implies":
+                    value = (full ^ registers[args[0]]) | registers[args[1]]
+                else:
+                    value = full ^ (registers[args[0]] ^ registers[args[1]])
+                registers.append(value)
+            yield registers
+
 
 def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    """Checks if knowledge base entails query, evaluating the compiled
+    sentences on every model at once as bit vectors."""
+
+    # Get all symbols in both knowledge and query
+    symbols = set.union(knowledge.symbols(), query.symbols())
+
+    program = Program(symbols)
+    knowledge_register = knowledge.compile(program)
+    query_register = query.compile(program)
+
+    # Entailment fails on a model where knowledge is true and query false
+    for registers in program.blocks():
+        if registers[knowledge_register] & ~registers[query_register]:
+            return False
+    return True
+
+
+def model_check_enumerate(knowledge, query):
+    """Checks if knowledge base entails query by evaluating the
+    sentences on one model at a time."""
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
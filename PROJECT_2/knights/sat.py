@@ -0,0 +1,412 @@
+"""
+Entailment by satisfiability.
+
+Knowledge entails a query exactly when knowledge ∧ ¬query has no model.
+CNF converts sentences of logic to clauses with the Tseitin encoding,
+which adds one variable per compound subsentence, so the clauses grow
+linearly with the sentences instead of exponentially. Solver is a
+conflict-driven clause learning (CDCL) SAT solver: unit propagation
+with two watched literals per clause, minimized first-UIP clause
+learning with non-chronological backjumping, activity-ordered
+decisions, phase saving, Luby restarts and periodic deletion of long
+learned clauses. entails then handles knowledge bases with hundreds of
+symbols, where model_check would enumerate 2^n models.
+
+A literal is a nonzero integer: variable v true is v and false is -v.
+"""
+
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class CNF():
+    """
+    Clauses equisatisfiable with the sentences added, over variables
+    1 to `count`. `variables` maps each symbol name to its variable.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.variables = {}
+        self.clauses = []
+        self.literals = {}
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def add(self, sentence):
+        """
+        Adds clauses that hold only where `sentence` is true.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct)
+                                 for disjunct in sentence.disjuncts])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """
+        Returns a literal that is true exactly where `sentence` is,
+        adding a variable and its defining clauses if needed.
+        """
+        if isinstance(sentence, Symbol):
+            variable = self.variables.get(sentence.name)
+            if variable is None:
+                variable = self.variables[sentence.name] = self.new_variable()
+            return variable
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+
+        literal = self.literals.get(sentence)
+        if literal is not None:
+            return literal
+        x = self.new_variable()
+        if isinstance(sentence, And):
+            parts = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            self.clauses.extend([-x, part] for part in parts)
+            self.clauses.append([x] + [-part for part in parts])
+        elif isinstance(sentence, Or):
+            parts = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            self.clauses.extend([x, -part] for part in parts)
+            self.clauses.append([-x] + parts)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            self.clauses.extend(([-x, -a, b], [x, a], [x, -b]))
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            self.clauses.extend(([-x, -a, b], [-x, a, -b],
+                                 [x, a, b], [x, -a, -b]))
+        else:
+            raise Exception("nothing to convert")
+        self.literals[sentence] = x
+        return x
+
+
+def luby(i):
+    """
+    Returns the i-th term (from 1) of the Luby sequence 1 1 2 1 1 2 4 ...
+    """
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while i != (1 << k) - 1:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class Solver():
+    """
+    A CDCL solver for clauses over variables 1 to `count`. `values` is
+    indexed by literal, so values[-v] is the value of -v, and holds
+    True, False or None while unassigned.
+    """
+
+    # Conflicts between restarts, times the Luby sequence
+    RESTART_CONFLICTS = 100
+
+    # Activity decay per conflict
+    DECAY = 0.95
+
+    # Conflicts between reductions of the learned clauses, of which the
+    # longer half are deleted
+    REDUCE_CONFLICTS = 2000
+
+    def __init__(self, count, clauses):
+        self.count = count
+        self.clauses = []
+        self.watches = [[] for _ in range(2 * count + 1)]
+        self.values = [None] * (2 * count + 1)
+        self.levels = [0] * (count + 1)
+        self.reasons = [None] * (count + 1)
+        self.phases = [False] * (count + 1)
+        self.activity = [0.0] * (count + 1)
+        self.increment = 1.0
+        self.order = [(0.0, v) for v in range(1, count + 1)]
+        self.learned = []
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        self.consistent = True
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def add_clause(self, clause):
+        """
+        Adds an input clause at decision level 0.
+        """
+        literals = []
+        for literal in clause:
+            if -literal in literals:
+                return
+            if literal not in literals and self.values[literal] is not False:
+                if self.values[literal] is True:
+                    return
+                literals.append(literal)
+        if not literals:
+            self.consistent = False
+        elif len(literals) == 1:
+            self.assign(literals[0], None)
+        else:
+            self.watch(literals)
+
+    def watch(self, literals):
+        """
+        Stores a clause and watches its first two literals.
+        """
+        index = len(self.clauses)
+        self.clauses.append(literals)
+        self.watches[literals[0]].append(index)
+        self.watches[literals[1]].append(index)
+        return index
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[literal] = True
+        self.values[-literal] = False
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.phases[variable] = literal > 0
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses. Returns the index
+        of a clause with every literal false, or None.
+        """
+        values = self.values
+        clauses = self.clauses
+        watches = self.watches
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            self.propagations += 1
+            watchers = watches[false]
+            kept = []
+            for position, index in enumerate(watchers):
+                clause = clauses[index]
+
+                # Drop the watches of deleted learned clauses
+                if clause is None:
+                    continue
+
+                # Keep the false literal second, so the first is the other watch
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                if values[first] is True:
+                    kept.append(index)
+                    continue
+
+                # Move the watch to another literal that is not false
+                for k in range(2, len(clause)):
+                    if values[clause[k]] is not False:
+                        clause[1], clause[k] = clause[k], false
+                        watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if values[first] is False:
+                        kept.extend(watchers[position + 1:])
+                        watches[false] = kept
+                        return index
+                    self.assign(first, index)
+            watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the first-UIP clause learned from a conflict, with the
+        asserting literal first and a literal of the backjump level
+        second, and the level to backjump to.
+        """
+        level = len(self.trail_limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        literal = None
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                variable = abs(other)
+                if variable not in seen and self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.levels[variable] == level:
+                        pending += 1
+                    else:
+                        learned.append(other)
+
+            # The latest assignment of the conflict at this level
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learned[0] = -literal
+
+        # Drop literals implied by the others: those whose reason has
+        # every other literal in the clause or fixed at level 0
+        seen = {abs(other) for other in learned}
+        minimized = learned[:1]
+        for other in learned[1:]:
+            reason = self.reasons[abs(other)]
+            if reason is None or any(
+                    abs(r) not in seen and self.levels[abs(r)] > 0
+                    for r in self.clauses[reason][1:]):
+                minimized.append(other)
+        learned = minimized
+        if len(learned) == 1:
+            return learned, 0
+        second = max(range(1, len(learned)),
+                     key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[second] = learned[second], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        """
+        Raises the activity of a variable seen in a conflict.
+        """
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-self.activity[v], v) for v in range(1, self.count + 1)
+                          if self.values[v] is None]
+            heapq.heapify(self.order)
+        elif self.values[variable] is None:
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+
+    def backjump(self, level):
+        """
+        Undoes every assignment above decision `level`.
+        """
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.values[literal] = self.values[-literal] = None
+            self.reasons[variable] = None
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = start
+
+    def reduce(self):
+        """
+        Deletes the longer half of the learned clauses, except those
+        that are the reason of an assignment and binary clauses.
+        """
+        locked = {self.reasons[abs(literal)] for literal in self.trail}
+        self.learned.sort(key=lambda index: len(self.clauses[index]))
+        half = len(self.learned) // 2
+        kept = self.learned[:half]
+        for index in self.learned[half:]:
+            if index in locked or len(self.clauses[index]) <= 2:
+                kept.append(index)
+            else:
+                self.clauses[index] = None
+        self.learned = kept
+
+    def decide(self):
+        """
+        Assigns the most active unassigned variable its saved phase.
+        Returns False if every variable is assigned.
+        """
+        while self.order:
+            _, variable = heapq.heappop(self.order)
+            if self.values[variable] is None:
+                self.decisions += 1
+                self.trail_limits.append(len(self.trail))
+                self.assign(variable if self.phases[variable] else -variable, None)
+                return True
+        return False
+
+    def solve(self):
+        """
+        Returns True if the clauses are satisfiable, leaving a model in
+        `values`, or False if they are not.
+        """
+        if not self.consistent or self.propagate() is not None:
+            return False
+        restarts = 1
+        budget = self.RESTART_CONFLICTS * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.trail_limits:
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backjump(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    index = self.watch(learned)
+                    self.learned.append(index)
+                    self.assign(learned[0], index)
+                self.increment /= self.DECAY
+                if self.conflicts % self.REDUCE_CONFLICTS == 0:
+                    self.reduce()
+
+                budget -= 1
+                if budget == 0:
+                    restarts += 1
+                    budget = self.RESTART_CONFLICTS * luby(restarts)
+                    self.backjump(0)
+            elif not self.decide():
+                return True
+
+    def model(self):
+        """
+        Returns the value of every variable after a successful solve.
+        """
+        return {v: bool(self.values[v]) for v in range(1, self.count + 1)}
+
+
+def satisfiable(sentence, stats=None):
+    """
+    Returns a model of `sentence`, a dict from each symbol name to a
+    bool, or None if it has none. If `stats` is a dict, it gets the
+    number of variables, clauses, decisions and conflicts.
+    """
+    cnf = CNF()
+    cnf.add(sentence)
+    solver = Solver(cnf.count, cnf.clauses)
+    found = solver.solve()
+    if stats is not None:
+        stats["variables"] = cnf.count
+        stats["clauses"] = len(cnf.clauses)
+        stats["decisions"] = solver.decisions
+        stats["conflicts"] = solver.conflicts
+        stats["propagations"] = solver.propagations
+    if not found:
+        return None
+    model = solver.model()
+    return {name: model[variable] for name, variable in cnf.variables.items()}
+
+
+def entails(knowledge, query, stats=None):
+    """
+    Checks if knowledge base entails query, as model_check does, by
+    checking that knowledge ∧ ¬query is unsatisfiable.
+    """
+    return satisfiable(And(knowledge, Not(query)), stats) is None